@@ -0,0 +1,130 @@
+import math
+import numbers
+from functools import lru_cache
+
+
+@lru_cache(maxsize=4096)
+def mmck(lam: float, mu: float, numServers: int, queueSize: int) -> dict:
+    """
+    Steady-state metrics of an M/M/c/K queue in closed form.
+
+    A GateWay whose servers all have exponential rate mu and whose
+    arrivals are Poisson with rate lam is an M/M/c/K queue with
+    c = numServers and K = numServers + queueSize places.  Results are
+    memoized, so repeated queries cost a dictionary lookup.
+
+    Args:
+        lam (float): Arrival rate at the gateway
+        mu (float): Service rate of each server
+        numServers (int): Number of servers c
+        queueSize (int): Waiting places; K = c + queueSize
+
+    Returns:
+        dict: "blocking" (probability an arrival is dropped), "queue_length"
+            (mean number waiting), "system_length" (mean number present),
+            "waiting_time" (mean queue delay of accepted messages),
+            "sojourn_time", "throughput" and "utilization" (busy fraction
+            of the servers)
+    """
+    if lam <= 0 or mu <= 0:
+        raise ValueError("lam and mu must be positive")
+    if numServers <= 0 or queueSize < 0:
+        raise ValueError("need numServers > 0 and queueSize >= 0")
+    c = numServers
+    capacity = c + queueSize
+
+    # unnormalized p_n = p_0 * prod(lam / (min(k, c) * mu)); rescale when
+    # the terms grow large so heavy loads do not overflow
+    terms = [1.0]
+    for n in range(1, capacity + 1):
+        terms.append(terms[-1] * lam / (min(n, c) * mu))
+        if terms[-1] > 1e250:
+            terms = [t / 1e250 for t in terms]
+    total = math.fsum(terms)
+    p = [t / total for t in terms]
+
+    blocking = p[capacity]
+    throughput = lam * (1.0 - blocking)
+    queue_length = math.fsum((n - c) * p[n] for n in range(c + 1, capacity + 1))
+    system_length = math.fsum(n * p[n] for n in range(capacity + 1))
+    return {
+        "blocking": blocking,
+        "queue_length": queue_length,
+        "system_length": system_length,
+        "waiting_time": queue_length / throughput,
+        "sojourn_time": system_length / throughput,
+        "throughput": throughput,
+        "utilization": throughput / (c * mu),
+    }
+
+
+def engine_summary(n_clients: int = 3, num_sources: int = 2, simulation_time: float = 10.0,
+                   lam=4.0, mu: float = 8.0, num_servers: int = 1,
+                   queue_size: int = 10, **_) -> dict:
+    """
+    Expected Engine.Summary() of an Engine run, from the M/M/c/K solution.
+
+    Takes Engine keyword arguments (others are ignored).  Clients send to
+    the num_sources gateways uniformly at random, so each gateway sees
+    Poisson arrivals at 1/num_sources of the total client rate.  Counts
+    are expectations over simulation_time; transient start-up effects of
+    an empty system are not included.
+    """
+    if mu is None:
+        raise ValueError("the analytic summary needs a fixed service rate mu")
+    total_rate = float(lam) * n_clients if isinstance(lam, numbers.Real) else math.fsum(lam[:n_clients])
+    gateway = mmck(total_rate / num_sources, mu, num_servers, queue_size)
+    return {
+        "arrivals": total_rate * simulation_time,
+        "arrival_rate": total_rate,
+        "served": gateway["throughput"] * num_sources * simulation_time,
+        "drop_rate": gateway["blocking"],
+        "queue_delay": gateway["waiting_time"],
+        "server_delay": 1.0 / mu,
+        "queue_length": gateway["queue_length"] * num_sources,
+        "utilization": gateway["utilization"],
+    }
+
+
+def compare(report: dict, params: dict, metrics=("drop_rate", "queue_delay",
+                                                 "queue_length", "utilization"),
+            slack: float = 0.0) -> dict:
+    """
+    Check simulated confidence intervals against the analytic values.
+
+    Args:
+        report (dict): metric -> (mean, half_width), as returned by
+            Replications.summarize_replications
+        params (dict): Engine keyword arguments of the simulated runs
+        metrics: Metrics to check
+        slack (float): Extra absolute tolerance added to each half-width,
+            e.g. for the start-up bias of short runs
+
+    Returns:
+        dict: metric -> (analytic, mean, half_width, ok), where ok tells
+            whether the analytic value lies within the widened interval
+    """
+    expected = engine_summary(**params)
+    result = {}
+    for name in metrics:
+        mean, half_width = report[name]
+        ok = abs(mean - expected[name]) <= half_width + slack
+        result[name] = (expected[name], mean, half_width, ok)
+    return result
+
+
+def main() -> None:
+    from Replications import replicate, summarize_replications
+
+    params = {"n_clients": 10, "simulation_time": 2000.0, "lam": 0.5,
+              "mu": 2.0, "num_servers": 2, "queue_size": 3}
+    n = 20
+    report = summarize_replications(replicate(n, params, seed=1))
+    print(f"Simulation ({n} replications) vs M/M/c/K for {params}")
+    print(f"{'metric':>14} | {'analytic':>10} | {'simulated':>10} | {'± 95%':>8} | ok")
+    for name, (expected, mean, half_width, ok) in compare(report, params).items():
+        print(f"{name:>14} | {expected:>10.5f} | {mean:>10.5f} | {half_width:>8.5f} | {ok}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+import contextlib
+import io
+import os
+import random
+import time
+import tracemalloc
+from Message import Message
+from Event import Event, EventType
+from Scheduler import Scheduler
+from RandomStreams import RandomStreams
+from GateWay import GateWay
+from Engine import Engine
+from LindleyEngine import LindleyEngine
+from Parallel import ParallelEngine
+from Topology import Topology
+from Analytics import mmck
+from RareEvent import ImportanceSplitting
+from Replications import reset_counters
+
+
+def bench_scheduler(pending: int, operations: int = 200_000, seed: int = 1,
+                    backend: str = "heap") -> float:
+    """
+    Classic "hold" benchmark for the future-event list.
+
+    Fills a Scheduler with `pending` events, then repeatedly pops the
+    earliest event and re-inserts it with an exponential increment, so
+    the population stays constant.
+
+    Args:
+        pending (int): Number of events kept in the scheduler
+        operations (int): Number of pop/push pairs to time
+        seed (int): Seed for the increment distribution
+        backend (str): Scheduler backend name ("heap", "calendar", "list")
+
+    Returns:
+        float: Hold operations (one pop + one push) per second
+    """
+    rng = random.Random(seed)
+    scheduler = Scheduler(backend=backend)
+    msg = Message(source="1", destination="0")
+    for _ in range(pending):
+        scheduler.add_event(Event(message=msg,
+                                  event_time=rng.expovariate(1.0),
+                                  event_type=EventType.SEND_MSG.value))
+
+    start = time.perf_counter()
+    for _ in range(operations):
+        evt = scheduler.get_event()
+        evt.event_time += rng.expovariate(1.0)
+        scheduler.add_event(evt)
+    elapsed = time.perf_counter() - start
+    return operations / elapsed
+
+
+def compare_backends(sizes=(10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5),
+                     backends=("list", "heap", "calendar"),
+                     operations: int = 50_000) -> None:
+    """
+    Print hold throughput for each scheduler backend across population sizes.
+
+    The O(n) list backend is skipped above 10^4 pending events, where a
+    single run would take minutes.
+    """
+    print("Scheduler backend comparison (hold ops/sec)")
+    print(f"{'pending':>10} | " + " | ".join(f"{b:>12}" for b in backends))
+    for pending in sizes:
+        cells = []
+        for backend in backends:
+            if backend == "list" and pending > 10 ** 4:
+                cells.append(f"{'-':>12}")
+                continue
+            rate = bench_scheduler(pending, operations, backend=backend)
+            cells.append(f"{rate:>12,.0f}")
+        print(f"{pending:>10} | " + " | ".join(cells))
+
+
+def bench_memory(n_messages: int = 100_000) -> float:
+    """
+    Measure the heap cost of one in-flight message.
+
+    An in-flight message is a Message plus the SEND_MSG and RECV_MSG
+    Events that reference it, which is what each simulated arrival keeps
+    alive in the future-event list.
+
+    Args:
+        n_messages (int): Number of in-flight messages to allocate
+
+    Returns:
+        float: Bytes allocated per in-flight message
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    in_flight = []
+    for i in range(n_messages):
+        msg = Message(source="1", destination="0")
+        in_flight.append(Event(message=msg, event_time=float(i),
+                               event_type=EventType.SEND_MSG.value))
+        in_flight.append(Event(message=msg, event_time=float(i),
+                               event_type=EventType.RECV_MSG.value))
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # exclude the list that holds the events alive
+    held = after - before - in_flight.__sizeof__()
+    return held / n_messages
+
+
+def bench_sampling(samples: int = 1_000_000, seed: int = 1) -> dict:
+    """
+    Compare exponential sampling through the global `random` module with a
+    buffered RandomStream.
+
+    Returns:
+        dict: Samples per second for "random" and "stream"
+    """
+    random.seed(seed)
+    stream = RandomStreams(seed).stream("client", 0)
+    rates = {}
+    for name, source in (("random", random), ("stream", stream)):
+        expovariate = source.expovariate
+        start = time.perf_counter()
+        for _ in range(samples):
+            expovariate(4.0)
+        rates[name] = samples / (time.perf_counter() - start)
+    return rates
+
+
+def bench_gateway(num_servers: int, operations: int = 200_000,
+                  server_select: str = "first", seed: int = 1) -> float:
+    """
+    Arrival/departure throughput of a saturated GateWay.
+
+    All but one server are kept busy, so every arrival has to find the
+    last idle server and every departure has to release it again.
+
+    Returns:
+        float: Arrival plus departure pairs per second
+    """
+    gateway = GateWay(numServers=num_servers, queueSize=0, verbose=False,
+                      streams=RandomStreams(seed), serverSelect=server_select)
+    for _ in range(num_servers - 1):
+        gateway.ReceiveMsg(Message(source="1", destination="0"))
+    msgs = [Message(source="1", destination="0") for _ in range(operations)]
+
+    start = time.perf_counter()
+    for msg in msgs:
+        gateway.ReceiveMsg(msg)
+        gateway.departureMsg(msg)
+    return operations / (time.perf_counter() - start)
+
+
+def bench_engine(n_clients: int = 100, simulation_time: float = 1000.0,
+                 lam: float = 0.05, num_servers: int = 4, seed: int = 1,
+                 **engine_args) -> float:
+    """
+    Throughput of the Engine.Run event loop on a full gateway pipeline.
+
+    Traces are neither stored nor printed, so the figure is the cost of
+    dispatching SEND_MSG, RECV_MSG and MSG_DEPT events.
+
+    Returns:
+        float: Events processed per second
+    """
+    engine = Engine(n_clients=n_clients, simulation_time=simulation_time,
+                    lam=lam, num_servers=num_servers, seed=seed,
+                    trace_sinks=[], store_traces=False, **engine_args)
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        engine.Run()
+        elapsed = time.perf_counter() - start
+    return engine.n_events / elapsed
+
+
+def bench_lindley(messages: int = 10 ** 7, num_servers: int = 1,
+                  queue_size: int = 50, seed: int = 1, load: float = 0.5) -> float:
+    """
+    Throughput of LindleyEngine at `load` per server.
+
+    Returns:
+        float: Messages per second
+    """
+    mu = 2.0
+    rate = load * mu * num_servers
+    engine = LindleyEngine(n_clients=1, num_sources=1, lam=rate, mu=mu,
+                           simulation_time=messages / rate,
+                           num_servers=num_servers, queue_size=queue_size, seed=seed)
+    start = time.perf_counter()
+    engine.Run()
+    return engine.Summary()["arrivals"] / (time.perf_counter() - start)
+
+
+def bench_routing(n: int = 1000, degree: int = 4, passes: int = 100,
+                  seed: int = 1) -> dict:
+    """
+    Cost of shortest-path routing on a random mesh of n nodes.
+
+    Routes between 1000 random node pairs are walked hop by hop through
+    the precomputed table, as Engine forwards a message.
+
+    Returns:
+        dict: "precompute" (seconds spent in compute_routes),
+            "lookups_per_sec" (next-hop lookups) and "mean_hops" per route
+    """
+    topology = Topology.random_mesh(n, degree, seed=seed)
+    start = time.perf_counter()
+    topology.compute_routes()
+    precompute = time.perf_counter() - start
+
+    rng = random.Random(seed)
+    pairs = [(rng.randrange(n), rng.randrange(n)) for _ in range(1000)]
+    routes = topology.routes
+    hops = 0
+    start = time.perf_counter()
+    for _ in range(passes):
+        for u, d in pairs:
+            while u != d:
+                u = routes[u][d].target
+                hops += 1
+    elapsed = time.perf_counter() - start
+    return {"precompute": precompute,
+            "lookups_per_sec": hops / elapsed,
+            "mean_hops": hops / (passes * len(pairs))}
+
+
+def bench_parallel(partitions=(1, 2, 4), delays=(0.01, 0.1, 1.0), n_clients: int = 800,
+                   num_sources: int = 16, simulation_time: float = 100.0,
+                   seed: int = 1) -> list:
+    """
+    Scaling of ParallelEngine with the partition count and the lookahead.
+
+    Every configuration is also run sequentially; the speedup is the
+    sequential wall time over the parallel one.  Each window costs one
+    synchronous round trip to every worker, so the number of windows
+    (about simulation_time / transmission_delay) bounds what a short
+    lookahead can gain.
+
+    Returns:
+        list: One dict per (delay, partitions) with "delay", "partitions",
+            "windows", "events_per_window", "seconds" and "speedup"
+    """
+    rows = []
+    for delay in delays:
+        params = dict(n_clients=n_clients, num_sources=num_sources, lam=1.0, mu=60.0,
+                      queue_size=10, simulation_time=simulation_time,
+                      transmission_delay=delay, seed=seed)
+        reset_counters()
+        engine = Engine(trace_sinks=[], store_traces=False, **params)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            engine.Run()
+            sequential = time.perf_counter() - start
+        for n_partitions in partitions:
+            reset_counters()
+            parallel = ParallelEngine(n_partitions=n_partitions, **params)
+            start = time.perf_counter()
+            parallel.Run()
+            elapsed = time.perf_counter() - start
+            rows.append({"delay": delay, "partitions": parallel.n_partitions,
+                         "windows": parallel.n_windows,
+                         "events_per_window": engine.n_events / parallel.n_windows,
+                         "seconds": elapsed, "speedup": sequential / elapsed})
+    return rows
+
+
+def bench_splitting(queue_size: int = 14, load: float = 0.25, effort: int = 50,
+                    repetitions: int = 40, seed: int = 1) -> dict:
+    """
+    Multilevel splitting against plain simulation on an M/M/1/K drop
+    probability; the defaults give about 7e-10.
+
+    Both are compared by work-normalized variance, relative error^2 x
+    CPU seconds, the usual efficiency figure for rare-event estimators.
+    Plain simulation is credited with the binomial relative error
+    sqrt((1 - p) / (p N)) of N independent arrivals at its measured
+    arrival rate, which its correlated drops can only make worse.  Single
+    splitting runs are right-skewed at this depth, so the budget goes to
+    many small repetitions for a trustworthy interval.
+
+    Returns:
+        dict: "exact", "estimate", "half_width", "relative_error",
+            "seconds", "work_normalized" for splitting,
+            "brute_work_normalized", "brute_seconds" (time plain
+            simulation needs for the same relative error) and "speedup"
+    """
+    params = {"n_clients": 4, "num_sources": 1, "lam": load / 4, "mu": 1.0,
+              "num_servers": 1, "queue_size": queue_size}
+    exact = mmck(load, 1.0, 1, queue_size)["blocking"]
+    splitting = ImportanceSplitting(params, effort=effort, seed=seed)
+    start = time.perf_counter()
+    report = splitting.estimate(repetitions)
+    seconds = time.perf_counter() - start
+    estimate, half_width, relative_error = report["drop_probability"]
+
+    engine = Engine(simulation_time=200_000 / load, trace_sinks=[], store_traces=False,
+                    seed=seed, **params)
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        engine.Run()
+        rate = engine.n_arrivals / (time.perf_counter() - start)
+    brute = (1 - exact) / (exact * rate)
+    work_normalized = relative_error ** 2 * seconds
+    return {"exact": exact, "estimate": estimate, "half_width": half_width,
+            "relative_error": relative_error, "seconds": seconds,
+            "work_normalized": work_normalized,
+            "brute_work_normalized": brute,
+            "brute_seconds": brute / relative_error ** 2,
+            "speedup": brute / work_normalized}
+
+
+def main() -> None:
+    print("Scheduler hold benchmark")
+    print(f"{'pending':>10} | {'ops/sec':>12}")
+    for pending in (10 ** 3, 10 ** 5, 10 ** 6):
+        rate = bench_scheduler(pending)
+        print(f"{pending:>10} | {rate:>12,.0f}")
+    print()
+    compare_backends()
+    print()
+    print(f"Memory per in-flight message: {bench_memory():.0f} bytes")
+    print()
+    for name, rate in bench_sampling().items():
+        print(f"Exponential samples/sec via {name:>6}: {rate:,.0f}")
+    print()
+    print("GateWay arrival+departure benchmark (pairs/sec)")
+    print(f"{'servers':>10} | {'first':>12} | {'fastest':>12}")
+    for num_servers in (1, 10, 100, 1000):
+        first = bench_gateway(num_servers)
+        fastest = bench_gateway(num_servers, server_select="fastest")
+        print(f"{num_servers:>10} | {first:>12,.0f} | {fastest:>12,.0f}")
+    print()
+    print(f"Engine event loop: {bench_engine():,.0f} events/sec")
+    print(f"Engine event loop with event pool: {bench_engine(event_pool=True):,.0f} events/sec")
+    print()
+    print("LindleyEngine throughput")
+    print(f"{'servers':>8} | {'queue':>6} | {'load':>5} | {'msg/sec':>12} | {'10^8 msgs':>9}")
+    for num_servers, queue_size, load in ((1, 50, 0.5), (1, 10, 0.5), (1, 10, 0.95),
+                                          (4, 10, 0.5), (4, 50, 0.9)):
+        rate = bench_lindley(num_servers=num_servers, queue_size=queue_size, load=load)
+        print(f"{num_servers:>8} | {queue_size:>6} | {load:>5} | {rate:>12,.0f} | "
+              f"{1e8 / rate:>8.0f}s")
+    print()
+    routing = bench_routing()
+    print(f"Routing, 1000-node mesh: tables in {routing['precompute']:.2f}s, "
+          f"{routing['lookups_per_sec']:,.0f} next-hop lookups/sec, "
+          f"{routing['mean_hops']:.1f} hops per route")
+    print()
+    print(f"ParallelEngine scaling ({os.cpu_count()} CPUs)")
+    print(f"{'delay':>6} | {'parts':>5} | {'windows':>8} | {'events/window':>13} | "
+          f"{'seconds':>8} | {'speedup':>7}")
+    for row in bench_parallel():
+        print(f"{row['delay']:>6} | {row['partitions']:>5} | {row['windows']:>8} | "
+              f"{row['events_per_window']:>13,.0f} | {row['seconds']:>8.2f} | "
+              f"{row['speedup']:>6.2f}x")
+    print()
+    split = bench_splitting()
+    print(f"Splitting, M/M/1/15 drops (exact {split['exact']:.3g}): "
+          f"{split['estimate']:.3g} ± {split['half_width']:.2g} in {split['seconds']:.0f}s, "
+          f"relative error {split['relative_error']:.0%}")
+    print(f"  work-normalized variance {split['work_normalized']:.3g} vs "
+          f"{split['brute_work_normalized']:.3g} for plain simulation "
+          f"({split['speedup']:,.0f}x; plain needs ~{split['brute_seconds'] / 86400:.0f} days "
+          f"for the same relative error)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import os
+import pickle
+import threading
+import zlib
+
+from Message import Message
+from Event import Event
+from Client import Client
+from Trace import Trace
+
+# Bumped whenever the layout of a snapshot changes
+CHECKPOINT_VERSION = 2
+
+# Classes whose instance ids come from a class-level counter
+COUNTER_CLASSES = (Message, Event, Client, Trace)
+
+
+def snapshot(engine) -> bytes:
+    """
+    Serialize an Engine and the class-level id counters to bytes.
+
+    Everything reachable from the engine is included: scheduler
+    contents, gateway queues and servers, random stream states, the
+    stopping monitors and accumulated statistics (see Engine.__getstate__
+    for what is left out).  Must be called between events.
+    """
+    state = {
+        "version": CHECKPOINT_VERSION,
+        "counters": {cls.__name__: cls._id_counter for cls in COUNTER_CLASSES},
+        "engine": engine,
+    }
+    return pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def restore(blob: bytes):
+    """Inverse of snapshot(); also resets the id counters to their saved values."""
+    state = pickle.loads(blob)
+    if state.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"unsupported checkpoint version {state.get('version')!r}")
+    for cls in COUNTER_CLASSES:
+        cls._id_counter = state["counters"][cls.__name__]
+    return state["engine"]
+
+
+def write_file(path: str, blob: bytes, level: int = 6) -> None:
+    """Compress a snapshot and replace `path` with it atomically."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(zlib.compress(blob, level))
+    os.replace(tmp, path)
+
+
+def load(path: str):
+    """Read a checkpoint file written by write_file and restore its Engine."""
+    with open(path, "rb") as f:
+        return restore(zlib.decompress(f.read()))
+
+
+class CheckpointWriter:
+    """
+    Background writer for periodic checkpoints.
+
+    The simulation thread only pickles its state (it has to, to get a
+    consistent snapshot between events); compression and file I/O run on
+    a writer thread.  If the writer is still busy with the previous
+    snapshot when the next one arrives, the older pending one is
+    replaced, so the file always converges to the latest state and the
+    simulation never waits on the disk.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._pending = None
+        self._closing = False
+        self._error = None
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._writer, name=f"checkpoint-writer:{path}",
+                                        daemon=True)
+        self._thread.start()
+
+    def submit(self, blob: bytes) -> None:
+        with self._cond:
+            self._raise_writer_error()
+            self._pending = blob
+            self._cond.notify_all()
+
+    def _writer(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closing:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                blob, self._pending = self._pending, None
+            try:
+                write_file(self.path, blob)
+            except BaseException as exc:  # reported to the simulation thread
+                self._error = exc
+
+    def _raise_writer_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def close(self) -> None:
+        """Write any pending snapshot and stop the writer thread."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._raise_writer_error()
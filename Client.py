@@ -6,13 +6,22 @@ from Event import Event, EventType
 class Client:
     _id_counter = 0
 
-    def __init__(self, lam: float):
-        """Initialize a new Client with exponential inter-arrival rate λ."""
+    def __init__(self, lam: float, stream=None, work_stream=None):
+        """
+        Initialize a new Client with exponential inter-arrival rate λ.
+
+        `stream` supplies the random variates (a RandomStreams.RandomStream);
+        without one the global `random` module is used.  With a
+        `work_stream`, every message also carries its service requirement
+        (Message.work), drawn from that stream at rate 1.
+        """
         self.client_id = Client._id_counter
         Client._id_counter += 1
 
         self.lam = lam
         self.msg = None
+        self.stream = stream if stream is not None else random
+        self.work_stream = work_stream
 
     def get_client_id(self) -> int:
         return self.client_id
@@ -34,15 +43,21 @@ class Client:
         Generate a new Message and schedule next inter-arrival.
         Returns (Message, inter_arrival_time).
         """
-        inter_arrival = random.expovariate(self.lam)
+        inter_arrival = self.stream.expovariate(self.lam)
         msg = Message(source=str(self.client_id + 1),  # IDs start at 1
                       destination=destination,
                       payload=payload)
+        if self.work_stream is not None:
+            msg.work = self.work_stream.expovariate(1.0)
         # assign simulated timestamp
         msg.timestamp = time.time() + inter_arrival
         self.msg = msg
         return msg, inter_arrival
 
+    def choose_destination(self, destinations: list) -> str:
+        """Pick the destination of the next message uniformly at random."""
+        return self.stream.choice(destinations)
+
     def start(self, destination: str, payload=None) -> Event:
         """
         Kick off this client's first event:
@@ -54,4 +69,68 @@ class Client:
             event_time=msg.get_timestamp(),
             event_type=EventType.SEND_MSG.value
         )
-        return evt
\ No newline at end of file
+        return evt
+
+class AggregateClient:
+    """
+    Superposition of Poisson clients that share one rate λ.
+
+    n independent Poisson streams of rate λ superpose exactly into one
+    Poisson stream of rate n·λ in which each arrival comes from a
+    uniformly chosen member.  An AggregateClient therefore keeps a
+    single pending SEND_MSG in the scheduler for the whole group and
+    draws the source id per arrival, so the future-event list stays
+    O(1) in the client count while traces still attribute every message
+    to an individual client.
+    """
+
+    def __init__(self, lam: float, client_ids, stream=None, work_stream=None):
+        """
+        Args:
+            lam (float): Arrival rate of each member client
+            client_ids: Sequence of member client ids (a range is O(1) memory)
+            stream: Source of random variates; defaults to the `random` module
+            work_stream: If given, source of each message's Message.work
+        """
+        if len(client_ids) == 0:
+            raise ValueError("an AggregateClient needs at least one member")
+        self.lam = lam
+        self.client_ids = client_ids
+        self.rate = lam * len(client_ids)
+        self.msg = None
+        self.stream = stream if stream is not None else random
+        self.work_stream = work_stream
+
+    def get_lambda(self) -> float:
+        """Per-member arrival rate."""
+        return self.lam
+
+    def get_rate(self) -> float:
+        """Aggregate arrival rate n·λ of the group."""
+        return self.rate
+
+    def get_num_clients(self) -> int:
+        return len(self.client_ids)
+
+    def get_msg(self) -> Message:
+        return self.msg
+
+    def send_msg(self, destination: str, payload=None):
+        """
+        Generate the group's next Message from a uniformly drawn member.
+        Returns (Message, inter_arrival_time).
+        """
+        inter_arrival = self.stream.expovariate(self.rate)
+        client_id = self.stream.choice(self.client_ids)
+        msg = Message(source=str(client_id + 1),  # IDs start at 1
+                      destination=destination,
+                      payload=payload)
+        if self.work_stream is not None:
+            msg.work = self.work_stream.expovariate(1.0)
+        msg.timestamp = time.time() + inter_arrival
+        self.msg = msg
+        return msg, inter_arrival
+
+    def choose_destination(self, destinations: list) -> str:
+        """Pick the destination of the next message uniformly at random."""
+        return self.stream.choice(destinations)
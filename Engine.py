@@ -1,13 +1,21 @@
+import numbers
 import time
-import random
+import Checkpoint
 from Message import Message
 from Queue import Queue
-from Trace import Trace
-from Event import Event, EventType
+from TraceStore import TraceStore
+from TraceSink import AsciiTableSink
+from TraceReader import TraceReader
+from Event import Event, EventType, EventPool
 from Scheduler import Scheduler
-from Client import Client
+from Client import Client, AggregateClient
+from RandomStreams import RandomStreams
 from Server import Server
 from GateWay import GateWay
+from SequentialStopping import SequentialStopping
+from Profiler import Profiler
+from Topology import Topology
+from EventStream import StreamEvent
 
 
 class Engine:
@@ -15,24 +23,220 @@ class Engine:
                  n_clients: int = 3,
                  num_sources: int = 2,
                  simulation_time: float = 10.0,
-                 lam: float = 4.0,
+                 lam=4.0,
                  mu: float = 8.0,
-                 transmission_delay=1.0
+                 num_servers: int = 1,
+                 queue_size: int = 10,
+                 transmission_delay: float = 0.0,
+                 scheduler_backend: str = "heap",
+                 event_pool: bool = False,
+                 trace_sinks=None,
+                 store_traces: bool = True,
+                 trace_events=("SEND_MSG",),
+                 replay_trace: str = None,
+                 replay_window: int = 1024,
+                 seed=None,
+                 aggregate_clients: bool = False,
+                 stop_targets: dict = None,
+                 stop_check_interval: int = 1000,
+                 checkpoint_path: str = None,
+                 checkpoint_interval: float = None,
+                 profiler: Profiler = None,
+                 topology: Topology = None,
+                 common_random_numbers: bool = False,
+                 variates: str = "native"
                  ):
         # Main parameters
         self.start_time = time.time()
         self.n_clients = n_clients
         self.simulation_time = simulation_time
-        self.lam = lam  # client arrival rate
+        self.lam = lam  # client arrival rate, or a list with one rate per client
+        # one arrival process per distinct rate instead of one per client
+        self.aggregate_clients = aggregate_clients
         self.mu = mu  # gateway service rate
-
-        # Gateways numbered from 1..num_sources
-        self.sources = [str(i + 1) for i in range(num_sources)]
+        # GateWay(numServers, queueSize) configuration of every gateway
+        self.num_servers = num_servers
+        self.queue_size = queue_size
+        # time from a client's SEND_MSG to the RECV_MSG at its gateway; also
+        # the lookahead of the partitioned run in Parallel.py
+        if transmission_delay < 0:
+            raise ValueError("transmission_delay must be non-negative")
+        self.transmission_delay = transmission_delay
+
+        # Gateways numbered from 1..num_sources, or the nodes of a topology:
+        # clients then attach to a node (see Topology.ingress) and messages
+        # are forwarded hop by hop along the precomputed routes, the
+        # transmission_delay being the client's access link
+        self.topology = topology
+        if topology is not None:
+            if topology.routes is None:
+                topology.compute_routes()
+            self.sources = list(topology.nodes)
+        else:
+            self.sources = [str(i + 1) for i in range(num_sources)]
+        # topology runs: messages forwarded over a link, and messages that
+        # reached their gateway with their total time in the network
+        self.n_forwarded = 0
+        self.n_delivered = 0
+        self.network_delay = 0.0
+
+        # Per-component random streams: client i draws from ("client", i),
+        # server j of gateway g from ("server", g, j); same seed, same run.
+        # variates="inversion"/"antithetic" makes two runs with one seed an
+        # antithetic pair (see RandomStreams.VARIATES)
+        self.seed = seed
+        self.streams = RandomStreams(seed, variates=variates)
+        # Common random numbers: each message carries its service
+        # requirement, drawn by its client from ("service", i), so runs
+        # that differ only in the gateways see the same arrivals and the
+        # same work; offered_work sums it over all arrivals
+        self.common_random_numbers = common_random_numbers
+        self.offered_work = 0.0
 
         # Components
-        self.scheduler = Scheduler()
+        # "heap" (default), "calendar" or "list"; see Scheduler.BACKENDS
+        self.scheduler = Scheduler(backend=scheduler_backend)
         self.clients = []
-        self.traces = []
+        # arrival process (Client or AggregateClient) of each pending SEND_MSG,
+        # keyed by message id; holds one entry per process
+        self.pending_sends = {}
+        # columnar in-memory traces (None disables them) and streaming sinks;
+        # by default traces are also printed as ASCII tables, pass
+        # trace_sinks=[] to run without console output
+        self.traces = TraceStore() if store_traces else None
+        self.trace_sinks = [AsciiTableSink()] if trace_sinks is None else list(trace_sinks)
+        # event types traced, by name; adding "RECV_MSG" and "MSG_DEPT"
+        # records each message's arrival at and departure from its gateway,
+        # which TraceStore.delays matches per message
+        self.trace_events = frozenset(EventType[name].value for name in trace_events)
+        self.CheckTraceLabels()
+        # optional free list recycling Events after Run has consumed them
+        self.event_pool = EventPool() if event_pool else None
+
+        # Trace-driven replay: arrivals come from a binary trace file instead
+        # of Client Poisson streams, at most replay_window of them pending
+        self.replay_trace = replay_trace
+        self.replay_window = replay_window
+        self.replay_arrivals = None
+        self.replay_pending = 0
+
+        # One GateWay per entry in self.sources, keyed by its id; built by
+        # CreateGateways when Run starts
+        self.gateways = {}
+
+        # Run's dispatch table: handler of each event type, indexed by the
+        # integer EventType code
+        self.BuildHandlers()
+
+        # Events processed by Run, SEND_MSG events among them, and
+        # messages addressed to a gateway that does not exist
+        self.n_events = 0
+        self.n_arrivals = 0
+        self.n_unrouted = 0
+
+        # Sequential stopping: with stop_targets (metric -> relative
+        # precision, e.g. {"queue_delay": 0.05, "drop_rate": 0.1}) Run ends
+        # as soon as every metric's batch-means interval is that tight;
+        # simulation_time stays an upper bound
+        self.stopping = (SequentialStopping(stop_targets, check_interval=stop_check_interval)
+                         if stop_targets else None)
+        self.stop_reason = None
+        self.stop_time = None
+
+        # Checkpointing: every checkpoint_interval simulated seconds the
+        # state is snapshotted and written to checkpoint_path in the
+        # background; Engine.Resume continues from such a file
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self.next_checkpoint = None
+        self.checkpoint_writer = None
+        # set once Run has created the clients, gateways and first events
+        self.started = False
+
+        # optional hot-path instrumentation; Run attaches it for its
+        # duration, without one the loop runs uninstrumented
+        self.profiler = profiler
+
+    def BuildHandlers(self) -> None:
+        """Fill self.handlers, Run's dispatch table."""
+        self.handlers = [None] * len(EventType)
+        self.handlers[EventType.SEND_MSG.value] = self.HandleSend
+        self.handlers[EventType.RECV_MSG.value] = (self.HandleRecv if self.topology is None
+                                                   else self.HandleHop)
+        self.handlers[EventType.MSG_DEPT.value] = self.HandleDeparture
+
+    def CheckTraceLabels(self) -> None:
+        """
+        Trace records store node ids as integers (Trace.RECORD_FORMAT), so a
+        traced topology run needs numeric node labels.
+        """
+        if self.topology is None or (self.traces is None and not self.trace_sinks):
+            return
+        labels = [label for label in self.sources if not label.lstrip("-").isdigit()]
+        if labels:
+            raise ValueError(f"traces need integer node labels, got {labels[0]!r}; relabel "
+                             f"the topology or pass store_traces=False and trace_sinks=[]")
+
+    def __getstate__(self) -> dict:
+        """
+        State saved in checkpoints.
+
+        Trace sinks (open files, writer threads), the checkpoint writer and
+        the profiler are left out; a resumed engine gets new ones.  So are
+        the stored traces, which grow with the run (sinks persist them as
+        they are written): a resumed engine stores only the records of its
+        own continuation.  Replay runs read their input lazily from a
+        memory-mapped file and cannot be saved.
+        """
+        if self.replay_arrivals is not None:
+            raise ValueError("replay runs cannot be checkpointed")
+        state = self.__dict__.copy()
+        del state["handlers"]
+        state["trace_sinks"] = []
+        state["traces"] = self.traces is not None
+        state["checkpoint_writer"] = None
+        state["profiler"] = None
+        state["scheduler"] = Profiler.unwrap(self.scheduler)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.traces = TraceStore() if state["traces"] else None
+        self.BuildHandlers()
+
+    def Checkpoint(self, path: str = None) -> None:
+        """
+        Save the engine state between events.
+
+        Without `path` the snapshot goes to checkpoint_path through the
+        background writer; with it, it is written synchronously.
+        """
+        blob = Checkpoint.snapshot(self)
+        if path is not None:
+            Checkpoint.write_file(path, blob)
+            return
+        if self.checkpoint_writer is None:
+            self.checkpoint_writer = Checkpoint.CheckpointWriter(self.checkpoint_path)
+        self.checkpoint_writer.submit(blob)
+
+    @staticmethod
+    def Resume(path: str, trace_sinks=None) -> "Engine":
+        """
+        Load an Engine from a checkpoint file; Run() then continues it.
+
+        Every call returns an independent copy, so several what-if
+        continuations (e.g. with a different simulation_time or
+        stop_targets set on the copy) can fork from one warmed-up state.
+        The class-level id counters are reset to their saved values.
+
+        Args:
+            path (str): File written by Checkpoint()
+            trace_sinks: Sinks for the resumed run; default none
+        """
+        engine = Checkpoint.load(path)
+        engine.trace_sinks = list(trace_sinks or [])
+        engine.CheckTraceLabels()
+        return engine
 
     def Test_msg(self) -> None:
         """Demonstrate basic Message usage."""
@@ -225,92 +429,443 @@ class Engine:
         print(f"Number of messages after fourth departure: {gateway.getNumMsg()}")
         print(f"Number of dropped messages: {gateway.getDroppedMsg()}")
 
+    def ClientRate(self, i: int) -> float:
+        """Arrival rate of the i-th client."""
+        if isinstance(self.lam, numbers.Real):
+            return self.lam
+        return self.lam[i]
+
+    def WorkStream(self, i: int):
+        """Service-requirement stream of the i-th arrival process, None without CRN."""
+        return self.streams.stream("service", i) if self.common_random_numbers else None
+
     def CreateClients(self) -> None:
-        """Instantiate n_clients and store in self.clients."""
-        for _ in range(self.n_clients):
-            c = Client(self.lam)
-            self.clients.append(c)
-        print(f"Created {len(self.clients)} clients.")
+        """
+        Instantiate n_clients and store in self.clients.
+
+        With aggregate_clients, clients sharing a rate become a single
+        AggregateClient; client ids are reserved exactly as if each client
+        had been created, so message sources are the same in both modes.
+        """
+        if not self.aggregate_clients:
+            for i in range(self.n_clients):
+                c = Client(self.ClientRate(i), stream=self.streams.stream("client", i),
+                           work_stream=self.WorkStream(i))
+                self.clients.append(c)
+            print(f"Created {len(self.clients)} clients.")
+            return
+
+        first_id = Client._id_counter
+        Client._id_counter += self.n_clients
+        if isinstance(self.lam, numbers.Real):
+            groups = {self.lam: range(first_id, first_id + self.n_clients)}
+        else:
+            groups = {}
+            for i in range(self.n_clients):
+                groups.setdefault(self.lam[i], []).append(first_id + i)
+        for g, (lam, ids) in enumerate(groups.items()):
+            self.clients.append(AggregateClient(lam, ids, stream=self.streams.stream("aggregate", g),
+                                                work_stream=self.WorkStream(g)))
+        print(f"Created {self.n_clients} clients in {len(self.clients)} aggregated arrival processes.")
+
+    def CreateGateways(self) -> None:
+        """Instantiate one GateWay per entry in self.sources."""
+        for i, source in enumerate(self.sources):
+            self.CreateGateway(i, source)
+
+    def CreateGateway(self, i: int, source: str) -> None:
+        """Instantiate the i-th GateWay, which serves `source`."""
+        self.gateways[source] = GateWay(numServers=self.num_servers,
+                                        queueSize=self.queue_size,
+                                        verbose=False,
+                                        streams=self.streams,
+                                        gatewayId=i,
+                                        mu=self.mu)
+        # start the occupancy series at the simulation clock origin
+        self.gateways[source].recordOccupancy(self.start_time)
 
     def InitEvents(self) -> None:
         """Schedule each client's first SEND_MSG Event."""
         for client in self.clients:
-            # destination should be "0" (your single gateway)
-            ev = client.start(destination="0")
+            dest = client.choose_destination(self.sources)
+            msg, ia = client.send_msg(destination=dest)
+            # offset from the simulation clock origin, not the wall clock,
+            # so that a seeded run is reproducible
+            msg.timestamp = self.start_time + ia
+            ev = self.NewEvent(
+                message=msg,
+                event_time=msg.timestamp,
+                event_type=EventType.SEND_MSG.value
+            )
+            self.pending_sends[msg.get_message_id()] = client
             self.scheduler.add_event(ev)
 
+    def InitReplay(self) -> None:
+        """Open the replay trace and schedule its first window of arrivals."""
+        if self.replay_window <= 0:
+            raise ValueError("replay_window must be positive")
+        self.replay_arrivals = TraceReader(self.replay_trace).arrivals()
+        self.replay_pending = 0
+        self.RefillReplay()
+
+    def RefillReplay(self) -> None:
+        """
+        Top the scheduler up to replay_window pending trace arrivals.
+
+        Trace arrivals are time-ordered, so while at least one of them is
+        pending in the scheduler every unread arrival is no earlier than
+        the next event, and feeding them lazily does not change the order
+        in which events are processed.
+        """
+        while self.replay_pending < self.replay_window:
+            arrival = next(self.replay_arrivals, None)
+            if arrival is None:
+                return
+            rel_time, node, destination, _ = arrival
+            msg = Message(source=str(node), destination=str(destination))
+            msg.timestamp = self.start_time + rel_time
+            self.scheduler.add_event(self.NewEvent(
+                message=msg,
+                event_time=msg.timestamp,
+                event_type=EventType.SEND_MSG.value
+            ))
+            self.replay_pending += 1
+
     def GenerateTrace(self, event: Event) -> None:
-        """Log only SEND_MSG events as traces."""
-        if event.get_event_type() != EventType.SEND_MSG.value:
+        """
+        Log events whose type is in trace_events (by default SEND_MSG only).
+
+        Each trace is one fixed-width record (see Trace.RECORD_FIELDS),
+        stored as a row of the columnar self.traces store and passed to
+        every sink in self.trace_sinks.
+        """
+        if event.get_event_type() not in self.trace_events:
+            return
+        if self.traces is None and not self.trace_sinks:
             return
 
-        rel_time = event.get_event_time() - self.start_time
-        tr = Trace(
-            event.get_event_id(),
-            event.get_message(),
-            rel_time,
-            event.get_event_type()
-        )
-        self.traces.append(tr)
-        tr.print_trace()
+        msg = event.get_message()
+        record = (event.get_event_time() - self.start_time,
+                  int(msg.get_source()),
+                  event.get_event_type(),
+                  int(msg.get_destination()),
+                  msg.get_message_id())
+        if self.traces is not None:
+            self.traces.append(*record)
+        for sink in self.trace_sinks:
+            sink.write(record)
+
+    def FlushTraces(self) -> None:
+        """Flush all trace sinks; closing them is left to their owner."""
+        for sink in self.trace_sinks:
+            sink.flush()
+
+    def NewEvent(self, message: Message, event_time: float, event_type: str) -> Event:
+        """Create an Event, reusing a pooled one when pooling is enabled."""
+        if self.event_pool is not None:
+            return self.event_pool.acquire(message, event_time, event_type)
+        return Event(message=message, event_time=event_time, event_type=event_type)
+
+    def HandleSend(self, evt: Event) -> None:
+        """
+        SEND_MSG: the message reaches its gateway (RECV_MSG) after the
+        transmission delay and the client that sent it schedules its next
+        send from its own stream.
+        """
+        self.n_arrivals += 1
+        self.GenerateTrace(evt)
+        msg = evt.message
+        now = evt.event_time
+        if msg.work is not None:
+            self.offered_work += msg.work
+        self.Deliver(msg, now + self.transmission_delay)
+
+        if self.replay_trace is not None:
+            # the next arrival comes from the trace, not from a client
+            self.replay_pending -= 1
+            return
+        client = self.pending_sends.pop(msg.get_message_id())
+        dest = client.choose_destination(self.sources)
+        new_msg, ia = client.send_msg(destination=dest)
+        self.pending_sends[new_msg.get_message_id()] = client
+        new_msg.timestamp = now + ia
+        self.scheduler.add_event(self.NewEvent(
+            message=new_msg,
+            event_time=new_msg.timestamp,
+            event_type=EventType.SEND_MSG.value
+        ))
+
+    def Deliver(self, msg: Message, recv_time: float) -> None:
+        """Schedule the RECV_MSG of a sent message at its gateway (or next node)."""
+        self.scheduler.add_event(self.NewEvent(
+            message=msg,
+            event_time=recv_time,
+            event_type=EventType.RECV_MSG.value
+        ))
+
+    def HandleRecv(self, evt: Event) -> None:
+        """RECV_MSG: deliver the message to its destination gateway."""
+        if evt.event_type in self.trace_events:
+            self.GenerateTrace(evt)
+        gateway = self.gateways.get(evt.message.destination)
+        if gateway is None:
+            self.n_unrouted += 1
+            return
+        dept_evt = gateway.ReceiveMsg(evt.message, now=evt.event_time)
+        if dept_evt is not None:
+            self.scheduler.add_event(dept_evt)
+        if self.stopping is not None:
+            # a dropped message leaves the gateway without an entry time
+            self.stopping.observe("drop_rate", 1.0 if evt.message.entry_time is None else 0.0)
+
+    def HandleHop(self, evt: Event) -> None:
+        """
+        RECV_MSG in a topology run: the message reached node msg.hop (its
+        client's node on the first hop).  It is forwarded over the next
+        link of its route, or handed to HandleRecv at its destination.
+        """
+        msg = evt.message
+        topology = self.topology
+        node = msg.hop
+        if node is None:
+            node = msg.hop = topology.ingress(msg.source)
+        destination = topology.index.get(msg.destination)
+        if destination is None or node == destination:
+            if destination is not None:
+                self.n_delivered += 1
+                self.network_delay += evt.event_time - msg.timestamp
+            self.HandleRecv(evt)
+            return
+        link = topology.routes[node][destination]
+        if link is None:
+            self.n_unrouted += 1
+            return
+        self.n_forwarded += 1
+        msg.hop = link.target
+        self.Deliver(msg, link.transmit(evt.event_time))
+
+    def HandleDeparture(self, evt: Event) -> None:
+        """MSG_DEPT: the message leaves its gateway, freeing its server."""
+        if evt.event_type in self.trace_events:
+            self.GenerateTrace(evt)
+        gateway = self.gateways[evt.message.destination]
+        msg = evt.message
+        if self.stopping is not None and msg.server is not None:
+            self.stopping.observe("queue_delay", msg.service_time - msg.entry_time)
+            self.stopping.observe("server_delay", evt.event_time - msg.service_time)
+        dept_evt = gateway.departureMsg(msg, now=evt.event_time)
+        if dept_evt is not None:
+            self.scheduler.add_event(dept_evt)
 
     def Run(self) -> None:
         """
-        Drive the simulation: process SEND_MSG events only,
-        scheduling each client's next send until time expires.
-        """
-        self.CreateClients()
-        self.InitEvents()
+        Drive the simulation until time expires.
 
-        end_time = self.start_time + self.simulation_time
-        while True:
-            next_time = self.scheduler.get_current_time()
-            if next_time is None or next_time > end_time:
-                break
+        Events are dispatched through self.handlers by their integer type:
+        SEND_MSG schedules the RECV_MSG at the destination gateway and the
+        client's next send, RECV_MSG hands the message to its GateWay, and
+        MSG_DEPT, scheduled at the absolute end of service, releases it.
 
-            evt = self.scheduler.get_event()
-            # only SEND_MSG are in the queue, but we still check type
-            self.GenerateTrace(evt)
+        With replay_trace set, arrivals are read lazily from the trace file
+        instead of being generated by clients.
+
+        The run ends when simulation_time is reached, when no events are
+        left or, with stop_targets, when the requested precision is
+        reached; stop_reason and stop_time record which and when.
+        """
+        for _ in self.EventLoop():
+            pass
 
-            if evt.get_event_type() == EventType.SEND_MSG.value:
-                # schedule this client’s next send
-                ia = random.expovariate(self.lam)
-                t_nx = evt.get_event_time() + ia
-
-                src = evt.get_message().get_source()
-                # destination should be "0"
-                new_msg = Message(
-                    source=src,
-                    destination="0"
-                )
-                new_msg.timestamp = t_nx
-
-            etype = evt.get_event_type()
-            msg = evt.get_message()
-
-            if etype == EventType.SEND_MSG.value:
-                # 1) arrival at gateway
-                recv_evt = Event(
-                    message=msg,
-                    event_time=evt.get_event_time(),
-                    event_type=EventType.RECV_MSG.value
-                )
-                self.scheduler.add_event(recv_evt)
-
-                # 2) schedule client's next send
-                ia = random.expovariate(self.lam)
-                t_next = evt.get_event_time() + ia
-                # propagate same client ID (already offset in InitEvents)
-                src = msg.get_source()
-                dest = random.choice(self.sources)
-                new_msg = Message(source=src, destination=dest)
-                new_msg.timestamp = t_next
-                next_evt = Event(
-                    message=new_msg,
-                    event_time=t_nx,
-                    event_type=EventType.SEND_MSG.value
-                )
-                self.scheduler.add_event(next_evt)
+    def EventLoop(self):
+        """
+        Generator behind Run: sets the run up, then yields every Event
+        right after its handler ran.  Closing it early ends the run with
+        stop_reason "consumer"; see IterEvents for the public stream.
+        """
+        if not self.started:
+            self.CreateGateways()
+            if self.replay_trace is not None:
+                self.InitReplay()
+            else:
+                self.CreateClients()
+                self.InitEvents()
+            self.started = True
+        self.stop_reason = None
+        self.stop_time = None
+
+        if self.profiler is not None:
+            self.profiler.attach(self)
+            try:
+                yield from self.RunLoop()
+            finally:
+                self.profiler.detach(self)
+        else:
+            yield from self.RunLoop()
+
+    def RunLoop(self):
+        """
+        The event loop of Run, over whatever handlers and scheduler are
+        installed; a generator yielding each handled Event (which a pooled
+        run recycles once the consumer resumes the loop).
+        """
+        replaying = self.replay_trace is not None
+        scheduler = self.scheduler
+        handlers = self.handlers
+        event_pool = self.event_pool
+        stopping = self.stopping
+        check_interval = stopping.check_interval if stopping is not None else 0
+        end_time = self.start_time + self.simulation_time
+        refill_at = self.replay_window // 2
+        checkpointing = self.checkpoint_path is not None and self.checkpoint_interval
+        if checkpointing and self.next_checkpoint is None:
+            self.next_checkpoint = self.start_time + self.checkpoint_interval
+        last_time = self.start_time
+        try:
+            while True:
+                if replaying and self.replay_pending <= refill_at:
+                    self.RefillReplay()
+                next_time = scheduler.get_current_time()
+                if next_time is None:
+                    self.stop_reason = "no_events"
+                    self.stop_time = end_time
+                    break
+                if next_time > end_time:
+                    self.stop_reason = "simulation_time"
+                    self.stop_time = end_time
+                    break
+
+                evt = scheduler.get_event()
+                self.n_events += 1
+                handlers[evt.event_type](evt)
+                last_time = evt.event_time
+                yield evt
+
+                if check_interval and self.n_events % check_interval == 0 and stopping.should_stop():
+                    self.stop_reason = "precision"
+                    self.stop_time = evt.event_time
+                    break
+
+                # the event is fully consumed; hand it back to the pool
+                if event_pool is not None:
+                    event_pool.release(evt)
+
+                if checkpointing and evt.event_time >= self.next_checkpoint:
+                    self.next_checkpoint += self.checkpoint_interval
+                    self.Checkpoint()
+        except GeneratorExit:
+            # the consumer stopped iterating
+            self.stop_reason = "consumer"
+            self.stop_time = last_time
+            raise
+        finally:
+            self.FlushTraces()
+            if self.checkpoint_writer is not None:
+                self.checkpoint_writer.close()
+                self.checkpoint_writer = None
+
+    def IterEvents(self):
+        """
+        Run the simulation lazily, yielding one EventStream.StreamEvent per
+        processed event.
+
+        Nothing is kept per event, so a consumer chaining the filters and
+        windowed aggregators of EventStream runs in constant memory.  The
+        simulation advances only as far as it is iterated: breaking out of
+        the loop (or closing the generator) ends the run with stop_reason
+        "consumer", and Summary() then covers the time simulated so far.
+        In topology runs a message's RECV_MSG at each intermediate node is
+        not yielded, only the one at its gateway, so every message is seen
+        arriving once.
+        """
+        gateways = self.gateways
+        start_time = self.start_time
+        recv = EventType.RECV_MSG.value
+        # drop counters seen so far, from where an earlier stream or the
+        # run a checkpoint was taken in left them; a RECV_MSG dropped its
+        # message iff it raised its gateway's counter
+        dropped = {d: g.totalMessagesDropped for d, g in gateways.items()}
+        # forwarding hops, which raise the counter as they are handled
+        forwarded = self.n_forwarded
+        for evt in self.EventLoop():
+            if self.n_forwarded != forwarded:
+                forwarded = self.n_forwarded
+                continue
+            msg = evt.message
+            lost = False
+            if evt.event_type == recv:
+                gateway = gateways.get(msg.destination)
+                if gateway is not None:
+                    count = gateway.totalMessagesDropped
+                    lost = count != dropped.get(msg.destination, 0)
+                    dropped[msg.destination] = count
+            yield StreamEvent(evt.event_time - start_time, evt.event_type, msg.message_id,
+                              msg.source, msg.destination, lost)
+
+    def Stream(self, batch_size: int = 1024):
+        """
+        IterEvents in lists of up to batch_size StreamEvents, which costs a
+        consumer one resumption per batch instead of per event.  As with
+        IterEvents, closing the stream stops the simulation.
+        """
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+        events = self.IterEvents()
+        try:
+            batch = []
+            for record in events:
+                batch.append(record)
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        finally:
+            events.close()
+
+    def Summary(self) -> dict:
+        """
+        Scalar metrics of the finished run, one value per metric name.
+
+        Used by Replications to aggregate independent runs.  Rates and
+        time averages are over the simulated time up to stop_time;
+        stop_reason is the one non-numeric entry.  With stop_targets, the
+        truncated batch-means estimates of SequentialStopping.report() are
+        included as well, and topology runs add the links crossed per
+        arrival ("hops") and the mean send-to-gateway time ("network_delay").
+        With common_random_numbers and a fixed mu, "offered_load" is the
+        work that arrived per unit of server capacity, whose expectation
+        is known (see VarianceReduction.expected_offered_load).
+        """
+        served = sum(g.totalMessagesServed for g in self.gateways.values())
+        dropped = sum(g.totalMessagesDropped for g in self.gateways.values())
+        queue_delay = sum(g.totalQueueDelay for g in self.gateways.values())
+        server_delay = sum(g.totalServerDelay for g in self.gateways.values())
+        end_time = self.stop_time if self.stop_time is not None else self.start_time + self.simulation_time
+        duration = end_time - self.start_time
+        gateways = list(self.gateways.values())
+        summary = {
+            "arrivals": self.n_arrivals,
+            "arrival_rate": self.n_arrivals / duration if duration > 0 else 0.0,
+            "served": served,
+            "drop_rate": dropped / self.n_arrivals if self.n_arrivals else 0.0,
+            "queue_delay": queue_delay / served if served else 0.0,
+            "server_delay": server_delay / served if served else 0.0,
+            "queue_length": sum(g.getTimeAverageQueueLength(end_time) for g in gateways),
+            "utilization": (sum(g.getUtilization(end_time) for g in gateways) / len(gateways)
+                            if gateways else 0.0),
+            "simulated_time": duration,
+            "stop_reason": self.stop_reason,
+        }
+        if self.topology is not None:
+            summary["hops"] = self.n_forwarded / self.n_arrivals if self.n_arrivals else 0.0
+            summary["network_delay"] = (self.network_delay / self.n_delivered
+                                        if self.n_delivered else 0.0)
+        if self.common_random_numbers and self.mu and gateways and duration > 0:
+            capacity = self.mu * self.num_servers * len(gateways) * duration
+            summary["offered_load"] = self.offered_work / capacity
+        if self.stopping is not None:
+            summary.update(self.stopping.report())
+        return summary
 
     def main(self) -> None:
         elapsed = time.time() - self.start_time
@@ -3,18 +3,24 @@ from enum import Enum
 import Message
 
 class EventType(Enum):
-    """Event types enumeration (moved from message.py)."""
-    SEND_MSG = "SEND_MSG"
-    RECV_MSG = "RECV_MSG"
-    MSG_DEPT = "MSG_DEPT"
+    """
+    Event types enumeration (moved from message.py).
+
+    Values are small integer codes: they index the Engine's handler table
+    and are the type codes stored in traces (see Trace.EVENT_TYPE_CODES).
+    """
+    SEND_MSG = 0
+    RECV_MSG = 1
+    MSG_DEPT = 2
 
 class Event:
+    __slots__ = ("event_id", "message", "event_time", "event_type")
     _id_counter = 0
 
     def __init__(self,
                  message: Message,
                  event_time: float = None,
-                 event_type: str = None):
+                 event_type: int = None):
         self.event_id   = Event._id_counter
         Event._id_counter += 1
 
@@ -22,15 +28,12 @@ class Event:
         self.event_time = event_time if event_time is not None else time.time()
         self.event_type = event_type
 
-    def __del__(self):
-        pass
-
     def get_event_id(self)   -> int:    return self.event_id
     def get_message(self)    -> Message:return self.message
     def get_event_time(self)-> float:  return self.event_time
-    def get_event_type(self)-> str:    return self.event_type
+    def get_event_type(self)-> int:    return self.event_type
     def set_event_time(self, ts: float)  -> None: self.event_time = ts
-    def set_event_type(self, et: str)    -> None: self.event_type = et
+    def set_event_type(self, et: int)    -> None: self.event_type = et
 
     def print_event(self) -> None:
         # you could do an analogous table here if desired
@@ -38,4 +41,42 @@ class Event:
 
     def __str__(self) -> str:
         return (f"Event(id={self.event_id}, message={self.message}, "
-                f"time={self.event_time}, type={self.event_type})")
\ No newline at end of file
+                f"time={self.event_time}, type={self.event_type})")
+
+
+class EventPool:
+    """
+    Free list of Event objects for reuse once the engine has consumed them.
+
+    acquire() hands out a recycled Event (with a fresh event_id) when one
+    is available and only allocates when the free list is empty.
+    release() must be called only when nothing else holds the Event.
+    """
+    __slots__ = ("free", "max_size")
+
+    def __init__(self, max_size: int = 4096):
+        self.free = []
+        self.max_size = max_size
+
+    def acquire(self,
+                message: Message,
+                event_time: float = None,
+                event_type: int = None) -> Event:
+        if not self.free:
+            return Event(message=message, event_time=event_time, event_type=event_type)
+        evt = self.free.pop()
+        evt.event_id = Event._id_counter
+        Event._id_counter += 1
+        evt.message = message
+        evt.event_time = event_time if event_time is not None else time.time()
+        evt.event_type = event_type
+        return evt
+
+    def release(self, event: Event) -> None:
+        if len(self.free) < self.max_size:
+            # drop the message reference so pooled events do not pin messages
+            event.message = None
+            self.free.append(event)
+
+    def __len__(self) -> int:
+        return len(self.free)
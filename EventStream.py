@@ -0,0 +1,94 @@
+from collections import namedtuple
+
+from Event import EventType
+
+# One processed event as yielded by Engine.IterEvents.  time is relative to
+# the simulation clock origin, as in traces; dropped is True for the
+# RECV_MSG of a message its gateway had no room for.  Topology runs yield
+# only the RECV_MSG at the message's gateway, not those of its hops
+StreamEvent = namedtuple("StreamEvent",
+                         ("time", "event_type", "message_id", "source", "destination", "dropped"))
+
+
+def flatten(batches):
+    """StreamEvents of the batches yielded by Engine.Stream, one at a time."""
+    for batch in batches:
+        yield from batch
+
+
+def of_type(events, *event_types):
+    """Events of the given EventType members (or integer codes)."""
+    codes = {t.value if isinstance(t, EventType) else t for t in event_types}
+    return (e for e in events if e.event_type in codes)
+
+
+def at_gateways(events, *gateways):
+    """Events whose message is addressed to one of the given gateway ids."""
+    gateways = {str(g) for g in gateways}
+    return (e for e in events if e.destination in gateways)
+
+
+def drops(events):
+    """RECV_MSG events whose message was dropped."""
+    return (e for e in events if e.dropped)
+
+
+def windowed(events, width: float, aggregate, initial):
+    """
+    Fold events into consecutive time windows of `width` seconds.
+
+    Only the current window's accumulator is held.  It is yielded as
+    (window start, accumulator) as soon as an event past the window
+    arrives; windows without events are yielded with a fresh accumulator,
+    so the output is a regular series.  The last, partial window is
+    yielded when the input ends.
+
+    Args:
+        events: StreamEvents in time order
+        width (float): Window length in simulated seconds
+        aggregate: Callable (accumulator, event) -> accumulator
+        initial: Callable returning an empty accumulator
+    """
+    if width <= 0:
+        raise ValueError("window width must be positive")
+    index = 0
+    acc = initial()
+    for e in events:
+        while e.time >= (index + 1) * width:
+            yield index * width, acc
+            index += 1
+            acc = initial()
+        acc = aggregate(acc, e)
+    yield index * width, acc
+
+
+def _count(counts: dict, key) -> dict:
+    counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def windowed_counts(events, width: float, key=lambda e: e.destination):
+    """Per window, a dict of event counts by key (the gateway by default)."""
+    return windowed(events, width, lambda counts, e: _count(counts, key(e)), dict)
+
+
+def drops_per_gateway(events, width: float = 1.0):
+    """Per window of `width` seconds, the number of drops at each gateway."""
+    return windowed_counts(drops(events), width)
+
+
+def main() -> None:
+    from Engine import Engine
+
+    engine = Engine(n_clients=20, num_sources=3, lam=4.0, mu=10.0, queue_size=3,
+                    simulation_time=1000.0, trace_sinks=[], store_traces=False, seed=1)
+    for start, counts in drops_per_gateway(engine.IterEvents(), width=1.0):
+        print(f"t={start:6.1f}s drops per gateway: {dict(sorted(counts.items()))}")
+        if start >= 9.0:
+            break
+    summary = engine.Summary()
+    print(f"stopped by the {summary['stop_reason']} after {summary['simulated_time']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,41 @@
+import heapq
 from Event import EventType, Event
 from Message import Message
 from Server import Server
 from Queue import Queue
+from OnlineStats import MetricStats
+from TimeSeries import StepSeries
 
 class GateWay:
-    def __init__(self, numServers: int, queueSize: int):
+    def __init__(self, numServers: int, queueSize: int, verbose: bool = True,
+                 streams=None, gatewayId: int = 0, serverSelect: str = "first",
+                 seriesCapacity: int = 1024, seriesWidth: float = 1.0,
+                 mu: float = None):
         """
         Initialize a GateWay object.
 
         Args:
             numServers (int): The number of servers in the gateway
             queueSize (int): The maximum size of the queue
+            verbose (bool): Print the running metrics on every departure
+            streams (RandomStreams): If given, server i gets its own
+                stream ("server", gatewayId, i); otherwise servers use the
+                global `random` module
+            gatewayId (int): Index of this gateway, used to key its streams
+            serverSelect (str): Which idle server takes a message: "first"
+                (O(1) free list, lowest index first while none have been
+                released) or "fastest" (heap keyed by server rate mu)
+            seriesCapacity (int): Buckets in the queue-length and
+                busy-server time series, see TimeSeries.StepSeries
+            seriesWidth (float): Initial bucket width of those series
+            mu (float): Service rate of every server; when None each server
+                picks a random rate (see Server)
         """
+        if serverSelect not in ("first", "fastest"):
+            raise ValueError(f"unknown serverSelect {serverSelect!r}; "
+                             f"expected 'first' or 'fastest'")
         self.numServers = numServers
+        self.verbose = verbose
         self.droppedMsg = 0  # Initialize counter for dropped messages
 
         # Initialize metrics
@@ -21,40 +44,187 @@ class GateWay:
         self.totalMessagesServed = 0
         self.totalMessagesDropped = 0
 
-        # Dictionary to store message entry times
-        self.messageEntryTimes = {}
-        self.messageServiceTimes = {}
+        # Constant-memory distributions of the per-message delays; the
+        # timestamps they are computed from travel with each Message
+        self.queueDelayStats = MetricStats()
+        self.serviceDelayStats = MetricStats()
+        self.sojournStats = MetricStats()
 
-        self.servers = [Server() for _ in range(numServers)]
+        # Time-weighted queue length and number of busy servers, recorded
+        # on every arrival and departure
+        self.queueLengthSeries = StepSeries(seriesCapacity, seriesWidth)
+        self.busyServersSeries = StepSeries(seriesCapacity, seriesWidth)
+
+        if streams is not None:
+            self.servers = [Server(stream=streams.stream("server", gatewayId, i), mu=mu)
+                            for i in range(numServers)]
+        else:
+            self.servers = [Server(mu=mu) for _ in range(numServers)]
+
+        # Idle-server index: a stack of server indices ("first") or a heap
+        # of (-mu, index) ("fastest"); servers are acquired and released
+        # through it instead of scanning self.servers
+        self.serverSelect = serverSelect
+        if serverSelect == "fastest":
+            self.idleServers = [(-server.mu, i) for i, server in enumerate(self.servers)]
+            heapq.heapify(self.idleServers)
+        else:
+            self.idleServers = list(range(numServers - 1, -1, -1))
 
         # Initialize a Queue object
         self.queue = Queue(sizeQueue=queueSize, numMsg=0)
 
 
-    def ReceiveMsg(self, msg: Message) -> None:
+    def ReceiveMsg(self, msg: Message, now: float = None):
         """
         Receive a message in the gateway.
 
         Args:
             msg (Message): The message to receive
+            now (float): Current simulation time; defaults to the message
+                timestamp
+
+        Returns:
+            Event: The MSG_DEPT event if the message went straight into
+                service, None if it was queued or dropped
         """
-        # First check if any server is not busy
-        for server in self.servers:
-            if not server.getBusy():
-                # If a server is not busy, call its BeginService method
-                event = server.BeginService(msg)
-                # Record the time when the message starts being served
-                self.messageServiceTimes[msg.get_message_id()] = event.get_event_time()
-                return
+        if now is None:
+            now = msg.get_timestamp()
+        msg.entry_time = now
+
+        # Hand the message to an idle server, if there is one
+        server = self.acquireServer()
+        if server is not None:
+            event = self.beginService(server, msg, now)
+            self.recordOccupancy(now)
+            return event
 
         # If all servers are busy, add the message to the queue
         if self.queue.addMsg(msg) == 1:
-            # Record the time when the message enters the queue
-            self.messageEntryTimes[msg.get_message_id()] = msg.get_timestamp()
+            self.recordOccupancy(now)
         else:
             # If the message couldn't be added to the queue (queue is full), increment dropped messages
+            msg.entry_time = None
             self.droppedMsg += 1
             self.totalMessagesDropped += 1
+        return None
+
+    def acquireServer(self):
+        """
+        Take an idle server out of the idle-server index and mark it busy.
+
+        Returns:
+            int: The server's index in self.servers, or None if all are busy
+        """
+        if not self.idleServers:
+            return None
+        if self.serverSelect == "fastest":
+            index = heapq.heappop(self.idleServers)[1]
+        else:
+            index = self.idleServers.pop()
+        self.servers[index].setBusy(True)
+        return index
+
+    def releaseServer(self, index: int) -> None:
+        """
+        Mark a server idle and return it to the idle-server index.
+
+        Args:
+            index (int): The server's index in self.servers
+        """
+        server = self.servers[index]
+        server.setBusy(False)
+        if self.serverSelect == "fastest":
+            heapq.heappush(self.idleServers, (-server.mu, index))
+        else:
+            self.idleServers.append(index)
+
+    def beginService(self, index: int, msg: Message, now: float) -> Event:
+        """
+        Start serving a message on a server and record on the message
+        when its service began and which server serves it.
+
+        Returns:
+            Event: The MSG_DEPT event returned by Server.BeginService,
+                moved from a service duration to the absolute time now + duration
+        """
+        event = self.servers[index].BeginService(msg)
+        msg.server = index
+        msg.service_time = now
+        event.event_time += now
+        return event
+
+    def getNumIdleServers(self) -> int:
+        """
+        Get the number of idle servers in the gateway.
+
+        Returns:
+            int: The number of idle servers
+        """
+        return len(self.idleServers)
+
+    def recordOccupancy(self, now: float) -> None:
+        """Record the current queue length and number of busy servers."""
+        self.queueLengthSeries.record(now, self.queue.numMsg)
+        self.busyServersSeries.record(now, self.numServers - len(self.idleServers))
+
+    def getTimeAverageQueueLength(self, until: float = None) -> float:
+        """
+        Get the time-weighted average number of queued messages.
+
+        Args:
+            until (float): End of the observation period (e.g. the end of
+                the run); defaults to the last arrival or departure
+
+        Returns:
+            float: The time-average queue length
+        """
+        if until is not None:
+            self.queueLengthSeries.advance(until)
+        return self.queueLengthSeries.mean()
+
+    def getUtilization(self, until: float = None) -> float:
+        """
+        Get the time-weighted fraction of busy servers.
+
+        Args:
+            until (float): See getTimeAverageQueueLength
+
+        Returns:
+            float: The server utilization in [0, 1]
+        """
+        if until is not None:
+            self.busyServersSeries.advance(until)
+        return self.busyServersSeries.mean() / self.numServers
+
+    def getOccupancySeries(self, until: float = None) -> dict:
+        """
+        Get the queue-length and busy-server time series as NumPy arrays.
+
+        Args:
+            until (float): See getTimeAverageQueueLength
+
+        Returns:
+            dict: "queue_length" and "busy_servers" -> the
+                StepSeries.to_arrays() of that series
+        """
+        if until is not None:
+            self.queueLengthSeries.advance(until)
+            self.busyServersSeries.advance(until)
+        return {"queue_length": self.queueLengthSeries.to_arrays(),
+                "busy_servers": self.busyServersSeries.to_arrays()}
+
+    def getStats(self) -> dict:
+        """
+        Get the distributions of queue delay, service delay and sojourn time.
+
+        Returns:
+            dict: "queue_delay", "service_delay" and "sojourn" -> the
+                MetricStats.summary() of that metric
+        """
+        return {"queue_delay": self.queueDelayStats.summary(),
+                "service_delay": self.serviceDelayStats.summary(),
+                "sojourn": self.sojournStats.summary()}
 
     def getNumServers(self) -> int:
         """
@@ -123,68 +293,53 @@ class GateWay:
         """
         return self.totalMessagesDropped
 
-    def departureMsg(self, msg: Message) -> None:
+    def departureMsg(self, msg: Message, now: float = None):
         """
         Process the departure of a message from the gateway.
 
         Args:
             msg (Message): The message to depart
+            now (float): Current simulation time; defaults to the message
+                timestamp
+
+        Returns:
+            Event: The MSG_DEPT event of the queued message that took the
+                freed server, or None
         """
-        # Check if all servers are busy
-        all_servers_busy = all(server.getBusy() for server in self.servers)
+        if now is None:
+            now = msg.get_timestamp()
+        index = msg.server
+        if index is None:
+            # the message was not in service; no server has finished
+            return None
 
         # Calculate delays and update metrics for the departing message
-        msg_id = msg.get_message_id()
-        current_time = msg.get_timestamp()
-
-        # Update server delay if we have a service time for this message
-        if msg_id in self.messageServiceTimes:
-            service_time = self.messageServiceTimes[msg_id]
-            server_delay = current_time - service_time
-            self.totalServerDelay += server_delay
-            del self.messageServiceTimes[msg_id]
-
-        # Update queue delay if we have an entry time for this message
-        if msg_id in self.messageEntryTimes:
-            entry_time = self.messageEntryTimes[msg_id]
-            queue_delay = service_time - entry_time if 'service_time' in locals() else 0
-            self.totalQueueDelay += queue_delay
-            del self.messageEntryTimes[msg_id]
+        queue_delay = msg.service_time - msg.entry_time
+        server_delay = now - msg.service_time
+        self.totalQueueDelay += queue_delay
+        self.totalServerDelay += server_delay
+        self.queueDelayStats.add(queue_delay)
+        self.serviceDelayStats.add(server_delay)
+        self.sojournStats.add(queue_delay + server_delay)
+        msg.entry_time = msg.service_time = msg.server = None
 
         # Increment the total messages served counter
         self.totalMessagesServed += 1
 
         # Display metrics
-        print(f"Total Queue Delay: {self.totalQueueDelay}")
-        print(f"Total Server Delay: {self.totalServerDelay}")
-        print(f"Total Messages Served: {self.totalMessagesServed}")
-        print(f"Total Messages Dropped: {self.totalMessagesDropped}")
-
-        # Find a busy server and mark it as not busy
-        for server in self.servers:
-            if server.getBusy():
-
-                # Check if there are messages in the queue
-                message = self.queue.getMsg()
-
-                # If a message was retrieved, process it
-                if message is not None:
-                    # Process the next message
-                    event = server.BeginService(message)
-                    # Record the time when the message starts being served
-                    self.messageServiceTimes[message.get_message_id()] = event.get_event_time()
-
-                return
-
-        # If no busy server was found, just try to get a message from the queue
+        if self.verbose:
+            print(f"Total Queue Delay: {self.totalQueueDelay}")
+            print(f"Total Server Delay: {self.totalServerDelay}")
+            print(f"Total Messages Served: {self.totalMessagesServed}")
+            print(f"Total Messages Dropped: {self.totalMessagesDropped}")
+
+        # Let the server that finished this message take the next queued
+        # message straight away, or release it
         message = self.queue.getMsg()
-
-        # If a message was retrieved, process it
         if message is not None:
-            # Find a non-busy server to process the message
-            for server in self.servers:
-                if not server.getBusy():
-                    event = server.BeginService(message)
-                    # Record the time when the message starts being served
-                    self.messageServiceTimes[message.get_message_id()] = event.get_event_time()
-                    break
+            event = self.beginService(index, message, now)
+        else:
+            self.releaseServer(index)
+            event = None
+        self.recordOccupancy(now)
+        return event
@@ -0,0 +1,289 @@
+import heapq
+import math
+import numbers
+from collections import deque
+
+import numpy as np
+
+from RandomStreams import RandomStreams
+
+
+class GatewayRecursion:
+    """
+    One FIFO GateWay with c identical exponential servers and a finite
+    queue, advanced a chunk of arrivals at a time.
+
+    Message i starts service at max(a_i, earliest server free time) (the
+    Kiefer-Wolfowitz form of Lindley's recursion) and is dropped when it
+    finds every server busy and queueSize messages waiting.  Each chunk
+    is walked in windows evaluated by NumPy under an assumption that
+    holds most of the time:
+
+    - c = 1, no drops: the recursion has the closed form
+
+          d_i = S_i + max(d_prev, max_{k<=i} (a_k - S_{k-1}))
+
+      with S the cumulative service time;
+    - c > 1, no waiting: every message starts at its arrival.
+
+    The window is committed up to the first message that breaks the
+    assumption, a stretch from there goes through the scalar recursion,
+    and the vector pass resumes after it.  Both lengths adapt to the
+    distance between such messages: a rare drop or wait costs a short
+    scalar stretch instead of sending the whole chunk down the slow path,
+    and when they are frequent (heavy load, or c > 1 with queueing) the
+    scalar stretches grow so that vector passes committing only a few
+    messages do not add to its cost.  Metrics are summed per chunk, so
+    memory is bounded by the chunk size.
+    """
+    # smallest vectorized window; messages handed to the scalar recursion
+    # after the vector pass stops, at least SCALAR_RUN and at most
+    # MAX_SCALAR_RUN; a vector pass committing fewer than MIN_GAIN
+    # messages costs more than the scalar recursion would
+    MIN_WINDOW = 256
+    SCALAR_RUN = 64
+    MAX_SCALAR_RUN = 1 << 14
+    MIN_GAIN = 64
+
+    def __init__(self, numServers: int, queueSize: int, end_time: float):
+        self.numServers = numServers
+        self.queueSize = queueSize
+        self.end_time = end_time
+
+        # recursion state carried across chunks: server free times (a heap)
+        # and the service start times of messages still waiting
+        self.free = [0.0] * numServers
+        self.waiting = deque()
+        # sizes of the next vectorized window and scalar stretch
+        self.window = self.MIN_WINDOW
+        self.scalar_run = self.SCALAR_RUN
+
+        self.arrivals = 0
+        self.dropped = 0
+        self.served = 0
+        self.total_wait = 0.0
+        self.total_service = 0.0
+        self.queue_area = 0.0  # integral of the queue length over [0, end_time]
+        self.busy_area = 0.0   # integral of the busy servers over [0, end_time]
+
+    def process(self, arrivals: np.ndarray, services: np.ndarray) -> None:
+        """Advance through a chunk of increasing arrival times and their service times."""
+        n = len(arrivals)
+        if n == 0:
+            return
+        vector_prefix = self._single_server if self.numServers == 1 else self._no_wait
+        starts = np.empty(n)
+        pos = 0
+        while pos < n:
+            end = min(n, pos + self.window)
+            k = vector_prefix(arrivals[pos:end], services[pos:end], starts[pos:end])
+            pos += k
+            if pos == end:
+                self.window = min(2 * self.window, n)
+                continue
+            self.window = max(self.MIN_WINDOW, 2 * k)
+            if k < self.MIN_GAIN:
+                self.scalar_run = min(2 * self.scalar_run, self.MAX_SCALAR_RUN)
+            else:
+                self.scalar_run = self.SCALAR_RUN
+            end = min(n, pos + self.scalar_run)
+            starts[pos:end] = self._scalar(arrivals[pos:end], services[pos:end])
+            pos = end
+        self._accumulate(arrivals, services, starts)
+
+    def _single_server(self, a: np.ndarray, s: np.ndarray, out: np.ndarray) -> int:
+        """
+        Vectorized c = 1 pass assuming no drops.
+
+        Start times of the messages before the first drop are written to
+        `out` and the state is advanced past them.
+
+        Returns:
+            int: Number of messages committed
+        """
+        cum = np.cumsum(s)
+        deps = cum + np.maximum(self.free[0], np.maximum.accumulate(a - (cum - s)))
+        starts = deps - s
+
+        # check the no-drop assumption: arrival i is dropped if the server
+        # is busy and queueSize earlier messages are still waiting.  Values
+        # after the first drop are wrong, but so is nothing before it
+        prev_deps = np.empty_like(deps)
+        prev_deps[0] = self.free[0]
+        prev_deps[1:] = deps[:-1]
+        busy = prev_deps > a
+        carried = np.fromiter(self.waiting, float, len(self.waiting))
+        index = np.arange(len(a))
+        waiting = (index - np.minimum(index, np.searchsorted(starts, a, side="right"))
+                   + len(carried) - np.searchsorted(carried, a, side="right"))
+        k = int(np.argmax(busy & (waiting >= self.queueSize)))
+        if k == 0 and not (busy[0] and waiting[0] >= self.queueSize):
+            k = len(a)
+        if k == 0:
+            return 0
+
+        last = a[k - 1]
+        out[:k] = starts[:k]
+        self.free[0] = float(deps[k - 1])
+        self.waiting = deque(x for x in self.waiting if x > last)
+        committed = starts[:k]
+        self.waiting.extend(committed[committed > last].tolist())
+        return k
+
+    def _no_wait(self, a: np.ndarray, s: np.ndarray, out: np.ndarray) -> int:
+        """
+        Vectorized c > 1 pass assuming every message finds a free server.
+
+        Message i then occupies a server over [a_i, a_i + s_i), and it
+        finds all c busy if the servers still busy from before the window
+        plus the earlier messages not yet departed at a_i number c (a
+        departure at a_i frees its server, as in the scalar recursion).
+
+        Returns:
+            int: Number of messages committed, each starting at arrival
+        """
+        deps = a + s
+        # earlier messages gone by a_i: no later one departs before a_i, so
+        # the count runs over the whole window, less message i itself when
+        # its service time rounded to zero
+        departed = np.searchsorted(np.sort(deps), a, side="right") - (deps <= a)
+        carried = np.sort(self.free)
+        busy = (len(carried) - np.searchsorted(carried, a, side="right")
+                + np.arange(len(a)) - departed)
+        k = int(np.argmax(busy >= self.numServers))
+        if k == 0 and busy[0] < self.numServers:
+            k = len(a)
+        if k == 0:
+            return 0
+
+        # servers still busy after the last committed arrival keep their
+        # free times; the idle ones are free from then on (any earlier
+        # free time gives the same starts)
+        last = float(a[k - 1])
+        pending = np.concatenate((carried[carried > last], deps[:k][deps[:k] > last]))
+        free = pending.tolist() + [last] * (self.numServers - len(pending))
+        heapq.heapify(free)
+        self.free = free
+        out[:k] = a[:k]
+        return k
+
+    def _scalar(self, a: np.ndarray, s: np.ndarray) -> np.ndarray:
+        """Scalar recursion for c servers with drops; NaN start marks a drop."""
+        free = self.free
+        waiting = self.waiting
+        queue_size = self.queueSize
+        starts = []
+        for t, service in zip(a.tolist(), s.tolist()):
+            while waiting and waiting[0] <= t:
+                waiting.popleft()
+            earliest = free[0]
+            if earliest > t:
+                if len(waiting) >= queue_size:
+                    starts.append(math.nan)
+                    continue
+                waiting.append(earliest)
+                heapq.heapreplace(free, earliest + service)
+                starts.append(earliest)
+            else:
+                heapq.heapreplace(free, t + service)
+                starts.append(t)
+        return np.array(starts)
+
+    def _accumulate(self, a: np.ndarray, s: np.ndarray, starts: np.ndarray) -> None:
+        accepted = ~np.isnan(starts)
+        a, s, starts = a[accepted], s[accepted], starts[accepted]
+        deps = starts + s
+        end = self.end_time
+        done = deps <= end
+
+        self.arrivals += len(accepted)
+        self.dropped += len(accepted) - len(a)
+        self.served += int(np.count_nonzero(done))
+        self.total_wait += float(np.sum(starts[done] - a[done]))
+        self.total_service += float(np.sum(s[done]))
+        clipped_starts = np.minimum(starts, end)
+        self.queue_area += float(np.sum(clipped_starts - a))
+        self.busy_area += float(np.sum(np.minimum(deps, end) - clipped_starts))
+
+
+class LindleyEngine:
+    """
+    Array-based alternative to Engine for Poisson clients feeding FIFO
+    gateways with exponential servers of rate mu.
+
+    Clients pick gateways uniformly at random, so each of the num_sources
+    gateways sees an independent Poisson stream at 1/num_sources of the
+    total client rate and is simulated on its own by a GatewayRecursion.
+    Arrival and service times are drawn as NumPy vectors, chunk_size at a
+    time, and no per-message objects are created.  Summary() has the same
+    metrics as Engine.Summary(); service times are rounded to 2 decimals
+    as in Server.BeginService.
+    """
+    def __init__(self,
+                 n_clients: int = 3,
+                 num_sources: int = 2,
+                 simulation_time: float = 10.0,
+                 lam=4.0,
+                 mu: float = 8.0,
+                 num_servers: int = 1,
+                 queue_size: int = 10,
+                 seed=None,
+                 chunk_size: int = 1 << 20,
+                 **_):
+        """Takes Engine's keyword arguments; those without effect here are ignored."""
+        if mu is None:
+            raise ValueError("LindleyEngine needs a fixed service rate mu")
+        self.n_clients = n_clients
+        self.simulation_time = simulation_time
+        self.lam = lam
+        self.mu = mu
+        self.num_servers = num_servers
+        self.queue_size = queue_size
+        self.sources = [str(i + 1) for i in range(num_sources)]
+        self.seed = seed
+        self.streams = RandomStreams(seed)
+        self.chunk_size = chunk_size
+        self.gateways = {}
+
+    def ArrivalRate(self) -> float:
+        """Total arrival rate of all clients."""
+        if isinstance(self.lam, numbers.Real):
+            return self.lam * self.n_clients
+        return math.fsum(self.lam[:self.n_clients])
+
+    def Run(self) -> None:
+        rate = self.ArrivalRate() / len(self.sources)
+        end_time = self.simulation_time
+        for g, source in enumerate(self.sources):
+            gateway = GatewayRecursion(self.num_servers, self.queue_size, end_time)
+            self.gateways[source] = gateway
+            generator = self.streams.stream("lindley", g).generator
+            last = 0.0
+            while last <= end_time:
+                a = last + np.cumsum(generator.standard_exponential(self.chunk_size) / rate)
+                last = float(a[-1])
+                a = a[:np.searchsorted(a, end_time, side="right")]
+                s = np.round(generator.standard_exponential(len(a)) / self.mu, 2)
+                gateway.process(a, s)
+
+    def Summary(self) -> dict:
+        """Same metrics as Engine.Summary()."""
+        gateways = list(self.gateways.values())
+        arrivals = sum(g.arrivals for g in gateways)
+        served = sum(g.served for g in gateways)
+        dropped = sum(g.dropped for g in gateways)
+        end_time = self.simulation_time
+        return {
+            "arrivals": arrivals,
+            "arrival_rate": arrivals / end_time,
+            "served": served,
+            "drop_rate": dropped / arrivals if arrivals else 0.0,
+            "queue_delay": sum(g.total_wait for g in gateways) / served if served else 0.0,
+            "server_delay": sum(g.total_service for g in gateways) / served if served else 0.0,
+            "queue_length": sum(g.queue_area for g in gateways) / end_time,
+            "utilization": (sum(g.busy_area for g in gateways)
+                            / (self.num_servers * end_time * len(gateways))
+                            if gateways else 0.0),
+            "simulated_time": end_time,
+            "stop_reason": "simulation_time",
+        }
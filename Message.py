@@ -58,6 +58,8 @@ from enum import Enum
 import time
 
 class Message:
+    __slots__ = ("message_id", "source", "destination", "payload", "timestamp",
+                 "entry_time", "service_time", "server", "hop", "work")
     _id_counter = 0
 
     def __init__(self, source: str, destination: str, payload=None):
@@ -69,6 +71,17 @@ class Message:
         self.payload     = payload
         self.timestamp   = time.time()
 
+        # Set by the GateWay holding the message: when it entered the
+        # gateway, when its service began and which server serves it
+        self.entry_time   = None
+        self.service_time = None
+        self.server       = None
+        # Topology runs: index of the node the message is travelling to
+        self.hop          = None
+        # Common random numbers: service requirement at rate 1, drawn by
+        # the sending client so it does not depend on which server serves it
+        self.work         = None
+
     def get_message_id(self) -> int:    return self.message_id
     def get_source(self)     -> str:    return self.source
     def get_destination(self)-> str:    return self.destination
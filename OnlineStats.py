@@ -0,0 +1,257 @@
+import math
+from statistics import NormalDist
+
+
+class RunningStats:
+    """
+    Count, mean, variance, min and max of a stream in O(1) memory.
+
+    Uses Welford's update, which stays accurate when the mean is large
+    compared to the spread, unlike a running sum of squares.
+    """
+    __slots__ = ("count", "mean", "_m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def variance(self) -> float:
+        """Sample variance (n - 1 denominator); 0 with fewer than two values."""
+        if self.count < 2:
+            return 0.0
+        return self._m2 / (self.count - 1)
+
+    def std(self) -> float:
+        return math.sqrt(self.variance())
+
+
+class P2Quantile:
+    """
+    Streaming estimate of one quantile with the P-square algorithm.
+
+    Jain and Chlamtac's P-square keeps five markers whose heights track
+    the minimum, the p/2, p and (1+p)/2 quantiles and the maximum, and
+    adjusts them with a piecewise-parabolic fit as values arrive, so the
+    estimate needs no stored observations.  The first five values are
+    kept exactly.
+    """
+    __slots__ = ("p", "heights", "positions", "desired", "increments")
+
+    def __init__(self, p: float):
+        if not 0.0 < p < 1.0:
+            raise ValueError("p must be in (0, 1)")
+        self.p = p
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1.0, 1.0 + 2.0 * p, 1.0 + 4.0 * p, 3.0 + 2.0 * p, 5.0]
+        self.increments = [0.0, p / 2.0, p, (1.0 + p) / 2.0, 1.0]
+
+    def add(self, x: float) -> None:
+        h = self.heights
+        if len(h) < 5:
+            h.append(x)
+            h.sort()
+            return
+
+        # find the cell k with h[k] <= x < h[k + 1], widening the extremes
+        if x < h[0]:
+            h[0] = x
+            k = 0
+        elif x >= h[4]:
+            h[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= h[k + 1]:
+                k += 1
+
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        desired = self.desired
+        inc = self.increments
+        desired[1] += inc[1]
+        desired[2] += inc[2]
+        desired[3] += inc[3]
+        desired[4] += 1.0
+
+        # move the three middle markers towards their desired positions
+        for i in (1, 2, 3):
+            d = desired[i] - n[i]
+            if d >= 1.0:
+                if n[i + 1] - n[i] <= 1:
+                    continue
+                d = 1
+            elif d <= -1.0:
+                if n[i - 1] - n[i] >= -1:
+                    continue
+                d = -1
+            else:
+                continue
+            height = self._parabolic(i, d)
+            if not h[i - 1] < height < h[i + 1]:
+                height = h[i] + d * (h[i + d] - h[i]) / (n[i + d] - n[i])
+            h[i] = height
+            n[i] += d
+
+    def _parabolic(self, i: int, d: int) -> float:
+        h, n = self.heights, self.positions
+        return h[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (h[i] - h[i - 1]) / (n[i] - n[i - 1]))
+
+    def value(self) -> float:
+        """Current estimate; exact below five values, nan with none."""
+        h = self.heights
+        if not h:
+            return math.nan
+        if len(h) < 5 or self.positions[4] == 5:
+            return h[int(round(self.p * (len(h) - 1)))]
+        return h[2]
+
+
+class LogHistogram:
+    """
+    Fixed-bin histogram with logarithmically spaced bins.
+
+    Bins cover [lo, hi) with `bins_per_decade` bins per factor of ten;
+    counts[0] holds values below lo (including zero) and counts[-1]
+    values of hi and above, so memory is fixed however many values are
+    added.
+    """
+    __slots__ = ("lo", "hi", "bins_per_decade", "counts", "_log_lo")
+
+    def __init__(self, lo: float = 1e-4, hi: float = 1e4, bins_per_decade: int = 10):
+        if not 0.0 < lo < hi:
+            raise ValueError("need 0 < lo < hi")
+        self.lo = lo
+        self.hi = hi
+        self.bins_per_decade = bins_per_decade
+        self._log_lo = math.log10(lo)
+        nbins = math.ceil((math.log10(hi) - self._log_lo) * bins_per_decade)
+        self.counts = [0] * (nbins + 2)
+
+    def add(self, x: float) -> None:
+        if x < self.lo:
+            self.counts[0] += 1
+        elif x >= self.hi:
+            self.counts[-1] += 1
+        else:
+            i = int((math.log10(x) - self._log_lo) * self.bins_per_decade) + 1
+            # guard against rounding at the top edge
+            self.counts[min(i, len(self.counts) - 2)] += 1
+
+    def edges(self) -> list:
+        """Edges of the regular bins; bin i of counts spans edges[i-1]..edges[i]."""
+        nbins = len(self.counts) - 2
+        return [self.lo * 10 ** (i / self.bins_per_decade) for i in range(nbins + 1)]
+
+
+class MetricStats:
+    """
+    Online summary of one metric: moments, p50/p95/p99 and a log histogram.
+    """
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    __slots__ = ("moments", "quantiles", "histogram")
+
+    def __init__(self):
+        self.moments = RunningStats()
+        self.quantiles = [P2Quantile(p) for p in self.QUANTILES]
+        self.histogram = LogHistogram()
+
+    def add(self, x: float) -> None:
+        self.moments.add(x)
+        for q in self.quantiles:
+            q.add(x)
+        self.histogram.add(x)
+
+    def summary(self) -> dict:
+        """count, mean, std, min, max, p50, p95 and p99 as a dict."""
+        m = self.moments
+        result = {"count": m.count, "mean": m.mean, "std": m.std(),
+                  "min": m.min if m.count else math.nan,
+                  "max": m.max if m.count else math.nan}
+        for q in self.quantiles:
+            result[f"p{round(q.p * 100)}"] = q.value()
+        return result
+
+
+def t_quantile(p: float, df: int) -> float:
+    """
+    Quantile of Student's t distribution with df degrees of freedom.
+
+    The Cornish-Fisher expansion around the normal quantile is accurate
+    to about 1e-5 beyond df = 30 but far off for the few replications
+    behind small-sample intervals (11.30 for 12.71 at df = 1, p = 0.975),
+    so up to df = 30 the quantile is exact: closed forms for df = 1 and 2,
+    and Newton's method on t_cdf, started from the expansion, above.
+    """
+    if df <= 0:
+        raise ValueError("df must be positive")
+    if not 0.0 < p < 1.0:
+        raise ValueError("p must be in (0, 1)")
+    if p < 0.5:
+        return -t_quantile(1.0 - p, df)
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    z = NormalDist().inv_cdf(p)
+    z3, z5, z7, z9 = z ** 3, z ** 5, z ** 7, z ** 9
+    t = (z
+         + (z3 + z) / (4 * df)
+         + (5 * z5 + 16 * z3 + 3 * z) / (96 * df ** 2)
+         + (3 * z7 + 19 * z5 + 17 * z3 - 15 * z) / (384 * df ** 3)
+         + (79 * z9 + 776 * z7 + 1482 * z5 - 1920 * z3 - 945 * z) / (92160 * df ** 4))
+    if df > 30:
+        return t
+    # the cdf is concave for t > 0, so from below the iterates rise
+    # monotonically to the root; a step past it lands below it next time
+    log_norm = (math.lgamma((df + 1) / 2) - math.lgamma(df / 2)
+                - 0.5 * math.log(df * math.pi))
+    for _ in range(100):
+        density = math.exp(log_norm - (df + 1) / 2 * math.log1p(t * t / df))
+        step = (t_cdf(t, df) - p) / density
+        t = t - step if t - step > 0 else t / 2
+        if abs(step) <= 1e-12 * max(1.0, t):
+            break
+    return t
+
+
+def t_cdf(t: float, df: int) -> float:
+    """
+    Distribution function of Student's t with integer df degrees of freedom,
+    from the finite series in cos(theta), theta = atan(t / sqrt(df))
+    (Abramowitz and Stegun 26.7.3-4).
+    """
+    theta = math.atan(abs(t) / math.sqrt(df))
+    c2 = math.cos(theta) ** 2
+    if df % 2:
+        term, total = math.cos(theta), 0.0
+        if df > 1:
+            total = term
+            for k in range(3, df - 1, 2):
+                term *= c2 * (k - 1) / k
+                total += term
+        inside = 2 / math.pi * (theta + math.sin(theta) * total)
+    else:
+        term = total = 1.0
+        for k in range(2, df - 1, 2):
+            term *= c2 * (k - 1) / k
+            total += term
+        inside = math.sin(theta) * total
+    return 0.5 + inside / 2 if t >= 0 else 0.5 - inside / 2
@@ -0,0 +1,404 @@
+import contextlib
+import io
+import math
+import os
+import sys
+import time
+import traceback
+from multiprocessing import Pipe, Process
+
+from Message import Message
+from Client import Client
+from Engine import Engine
+
+
+class PartitionEngine(Engine):
+    """
+    One partition of a ParallelEngine run.
+
+    It owns a contiguous block of the gateways and every n_partitions-th
+    client, and runs the ordinary Engine handlers over its own scheduler.
+    A message addressed to a gateway of another partition is not
+    scheduled locally but collected in the outbox; the coordinator hands
+    it to its owner, which schedules the RECV_MSG there.
+
+    In topology runs the partition owns a block of nodes, the links
+    leaving them and the clients attached to them, so a message's first
+    hop is always local and only a hop over a link into another block
+    goes through the outbox.
+    """
+    def __init__(self, partition: int, n_partitions: int, start_time: float, **params):
+        """
+        Args:
+            partition (int): Index of this partition
+            n_partitions (int): Number of partitions of the run
+            start_time (float): Simulation clock origin shared by all
+                partitions
+            **params: Engine keyword arguments
+        """
+        super().__init__(**params)
+        self.start_time = start_time
+        self.end_time = start_time + self.simulation_time
+        self.partition = partition
+        self.n_partitions = n_partitions
+        self.owners = partition_owners(self.sources, n_partitions)
+        # per destination partition: (recv_time, send_time, source,
+        # destination, work, hop)
+        self.outbox = [[] for _ in range(n_partitions)]
+
+    def CreateGateways(self) -> None:
+        """Instantiate this partition's gateways with their global indices."""
+        for i, source in enumerate(self.sources):
+            if self.owners[source] == self.partition:
+                self.CreateGateway(i, source)
+
+    def CreateClients(self) -> None:
+        """Instantiate this partition's clients with their global ids and streams."""
+        first_id = Client._id_counter
+        Client._id_counter += self.n_clients
+        if self.topology is None:
+            mine = range(self.partition, self.n_clients, self.n_partitions)
+        else:
+            # client k sends from node (k - 1) mod n, see Topology.ingress
+            n = len(self.sources)
+            mine = [i for i in range(self.n_clients)
+                    if self.owners[self.sources[(first_id + i) % n]] == self.partition]
+        for i in mine:
+            c = Client(self.ClientRate(i), stream=self.streams.stream("client", i),
+                       work_stream=self.WorkStream(i))
+            c.client_id = first_id + i
+            self.clients.append(c)
+        Client._id_counter = first_id + self.n_clients
+
+    def Owner(self, msg: Message) -> int:
+        """Partition that handles the next RECV_MSG of `msg`."""
+        if self.topology is None:
+            return self.owners.get(msg.destination, self.partition)
+        node = msg.hop if msg.hop is not None else self.topology.ingress(msg.source)
+        return self.owners[self.sources[node]]
+
+    def Deliver(self, msg: Message, recv_time: float) -> None:
+        owner = self.Owner(msg)
+        if owner == self.partition:
+            Engine.Deliver(self, msg, recv_time)
+        elif recv_time <= self.end_time:
+            # arrivals after the end would never be processed anyway
+            self.outbox[owner].append((recv_time, msg.timestamp, msg.source, msg.destination,
+                                       msg.work, msg.hop))
+
+    def Receive(self, records: list) -> None:
+        """Schedule the RECV_MSG of messages sent by other partitions."""
+        for recv_time, send_time, source, destination, work, hop in records:
+            msg = Message(source=source, destination=destination)
+            msg.timestamp = send_time
+            # the service requirement drawn by the client under CRN, and
+            # the node the message is arriving at in topology runs
+            msg.work = work
+            msg.hop = hop
+            Engine.Deliver(self, msg, recv_time)
+
+    def RunWindow(self, window_end: float) -> None:
+        """Process every local event earlier than window_end (and not past the end)."""
+        scheduler = self.scheduler
+        handlers = self.handlers
+        event_pool = self.event_pool
+        limit = self.end_time
+        while True:
+            next_time = scheduler.get_current_time()
+            if next_time is None or next_time >= window_end or next_time > limit:
+                return
+            evt = scheduler.get_event()
+            self.n_events += 1
+            handlers[evt.event_type](evt)
+            if event_pool is not None:
+                event_pool.release(evt)
+
+    def TakeOutbox(self) -> tuple:
+        """
+        Returns:
+            tuple: (outbox, earliest receive time in it or None); the
+                outbox is emptied
+        """
+        outbox = self.outbox
+        self.outbox = [[] for _ in range(self.n_partitions)]
+        # records are appended in send order, which is not receive order
+        earliest = min((r[0] for box in outbox for r in box), default=None)
+        return outbox, earliest
+
+    def PartitionSummary(self) -> dict:
+        """Per-gateway totals and counters that ParallelEngine.Summary combines."""
+        gateways = {source: (g.totalMessagesServed,
+                             g.totalMessagesDropped,
+                             g.totalQueueDelay,
+                             g.totalServerDelay,
+                             g.getTimeAverageQueueLength(self.end_time),
+                             g.getUtilization(self.end_time))
+                    for source, g in self.gateways.items()}
+        return {"gateways": gateways,
+                "arrivals": self.n_arrivals,
+                "offered_work": self.offered_work,
+                "forwarded": self.n_forwarded,
+                "delivered": self.n_delivered,
+                "network_delay": self.network_delay,
+                "events": self.n_events,
+                "unrouted": self.n_unrouted}
+
+
+def partition_owners(sources: list, n_partitions: int) -> dict:
+    """Gateway id -> partition index, in contiguous blocks of gateways."""
+    return {source: i * n_partitions // len(sources) for i, source in enumerate(sources)}
+
+
+def partition_worker(conn, partition: int, n_partitions: int, start_time: float,
+                     params: dict) -> None:
+    """
+    Process body of one partition, driven by ParallelEngine over `conn`.
+
+    Replies to ("window", inbound records, window_end) with
+    ("window", outbox, earliest outbox time, next local event time) and
+    to ("finish",) with ("summary", PartitionSummary()); any exception is
+    sent back as ("error", traceback text).
+    """
+    try:
+        # CreateClients and friends report progress on stdout
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine = PartitionEngine(partition, n_partitions, start_time, **params)
+            engine.CreateGateways()
+            engine.CreateClients()
+            engine.InitEvents()
+        conn.send(("ready", engine.scheduler.get_current_time()))
+        while True:
+            command = conn.recv()
+            if command[0] == "window":
+                _, inbound, window_end = command
+                engine.Receive(inbound)
+                engine.RunWindow(window_end)
+                outbox, earliest = engine.TakeOutbox()
+                conn.send(("window", outbox, earliest, engine.scheduler.get_current_time()))
+            elif command[0] == "finish":
+                conn.send(("summary", engine.PartitionSummary()))
+                return
+    except Exception:
+        conn.send(("error", traceback.format_exc()))
+    finally:
+        conn.close()
+
+
+class ParallelEngine:
+    """
+    Conservative parallel run of an Engine configuration.
+
+    The gateways are split into n_partitions contiguous groups, each
+    simulated in its own process together with its share of the clients
+    (see PartitionEngine).  The only interaction between partitions is a
+    client's message to a gateway of another partition, which arrives
+    transmission_delay after it was sent, or in topology runs a message
+    crossing a link between two groups of nodes, which takes at least the
+    link's latency (Link.cost).  The smallest such delay is the lookahead
+    of a time-window protocol:
+
+    - with T the earliest pending event or in-flight message over all
+      partitions, every partition processes its events before T +
+      lookahead.  No message sent in that window can arrive in it, so
+      no partition ever receives an event in its past;
+    - the messages sent in the window are then routed to their owners
+      and the next window starts.
+
+    Every client and server draws from the same stream as in a sequential
+    Engine, and the gateways of one partition see exactly the arrivals
+    they would see sequentially, so with the same start_time Summary()
+    equals Engine.Summary() (up to ties between simultaneous events).
+    Under common_random_numbers messages carry their service requirement
+    across partitions, and offered_load, being summed per partition,
+    agrees up to rounding.
+    Traces, replay, sequential stopping, checkpoints, profiling and
+    aggregate clients are not available in a parallel run.
+
+    Every window costs one synchronous round trip to every worker, so a
+    run takes about simulation_time / lookahead windows whatever the
+    load: a speedup needs enough events per window (many busy gateways,
+    long delays) to outweigh it (see Benchmark.bench_parallel).
+    """
+    def __init__(self, n_partitions: int = None, **params):
+        """
+        Args:
+            n_partitions (int): Worker processes; defaults to
+                os.cpu_count(), at most one per gateway
+            **params: Engine keyword arguments; transmission_delay must be
+                positive unless a topology is given
+        """
+        for name in ("replay_trace", "stop_targets", "checkpoint_path", "profiler"):
+            if params.get(name):
+                raise ValueError(f"{name} is not supported by ParallelEngine")
+        if params.get("aggregate_clients"):
+            raise ValueError("aggregate_clients is not supported by ParallelEngine")
+        topology = params.get("topology")
+        if topology is None and not params.get("transmission_delay", 0.0) > 0:
+            raise ValueError("ParallelEngine needs a positive transmission_delay as lookahead")
+        params = dict(params)
+        params["trace_sinks"] = []
+        params["store_traces"] = False
+        self.params = params
+
+        self.start_time = time.time()
+        self.simulation_time = params.get("simulation_time", 10.0)
+        self.topology = topology
+        if topology is not None:
+            if topology.routes is None:
+                topology.compute_routes()
+            self.sources = list(topology.nodes)
+        else:
+            self.sources = [str(i + 1) for i in range(params.get("num_sources", 2))]
+        n_partitions = n_partitions or os.cpu_count() or 1
+        self.n_partitions = max(1, min(n_partitions, len(self.sources)))
+        if self.n_partitions == 1:
+            # nothing crosses partitions: one window covers the run
+            self.lookahead = math.inf
+        elif topology is None:
+            self.lookahead = params["transmission_delay"]
+        else:
+            # the latency of the fastest link between two partitions
+            owners = partition_owners(self.sources, self.n_partitions)
+            self.lookahead = min((link.cost() for out in topology.links for link in out.values()
+                                  if owners[self.sources[link.source]]
+                                  != owners[self.sources[link.target]]),
+                                 default=math.inf)
+            if not self.lookahead > 0:
+                raise ValueError("ParallelEngine needs links of positive latency between "
+                                 "partitions as lookahead")
+
+        # windows executed and messages that crossed partitions
+        self.n_windows = 0
+        self.n_remote = 0
+        self.results = None
+
+    def Run(self) -> None:
+        """Start the partition processes and drive them window by window."""
+        n = self.n_partitions
+        end_time = self.start_time + self.simulation_time
+        conns, workers = [], []
+        for p in range(n):
+            parent, child = Pipe()
+            worker = Process(target=partition_worker, name=f"partition-{p}",
+                             args=(child, p, n, self.start_time, self.params), daemon=True)
+            worker.start()
+            child.close()
+            conns.append(parent)
+            workers.append(worker)
+        try:
+            next_times = [self._reply(conn, "ready")[0] for conn in conns]
+            inbound = [[] for _ in range(n)]
+            in_flight = None  # earliest receive time among routed messages
+            while True:
+                pending = [t for t in next_times if t is not None]
+                if in_flight is not None:
+                    pending.append(in_flight)
+                if not pending or min(pending) > end_time:
+                    break
+                window_end = min(pending) + self.lookahead
+                for p, conn in enumerate(conns):
+                    conn.send(("window", inbound[p], window_end))
+                inbound = [[] for _ in range(n)]
+                in_flight = None
+                for p, conn in enumerate(conns):
+                    outbox, earliest, next_times[p] = self._reply(conn, "window")
+                    for q, records in enumerate(outbox):
+                        inbound[q].extend(records)
+                        self.n_remote += len(records)
+                    if earliest is not None and (in_flight is None or earliest < in_flight):
+                        in_flight = earliest
+                self.n_windows += 1
+
+            for conn in conns:
+                conn.send(("finish",))
+            self.results = [self._reply(conn, "summary")[0] for conn in conns]
+        finally:
+            for conn in conns:
+                conn.close()
+            for worker in workers:
+                worker.join(timeout=5)
+                if worker.is_alive():
+                    worker.terminate()
+
+    @staticmethod
+    def _reply(conn, expected: str) -> tuple:
+        """Receive a worker's reply, re-raising its error if it failed."""
+        tag, *payload = conn.recv()
+        if tag == "error":
+            raise RuntimeError("partition worker failed:\n" + payload[0])
+        if tag != expected:
+            raise RuntimeError(f"unexpected reply {tag!r} from partition worker")
+        return payload
+
+    def Summary(self) -> dict:
+        """Same metrics as Engine.Summary(), combined over the partitions."""
+        if self.results is None:
+            raise RuntimeError("Summary() called before Run()")
+        per_gateway = {}
+        for result in self.results:
+            per_gateway.update(result["gateways"])
+        # sum in gateway order, as Engine.Summary does, for identical floats
+        gateways = [per_gateway[source] for source in self.sources]
+        arrivals = sum(r["arrivals"] for r in self.results)
+        served = sum(g[0] for g in gateways)
+        dropped = sum(g[1] for g in gateways)
+        queue_delay = sum(g[2] for g in gateways)
+        server_delay = sum(g[3] for g in gateways)
+        duration = self.simulation_time
+        summary = {
+            "arrivals": arrivals,
+            "arrival_rate": arrivals / duration if duration > 0 else 0.0,
+            "served": served,
+            "drop_rate": dropped / arrivals if arrivals else 0.0,
+            "queue_delay": queue_delay / served if served else 0.0,
+            "server_delay": server_delay / served if served else 0.0,
+            "queue_length": sum(g[4] for g in gateways),
+            "utilization": (sum(g[5] for g in gateways) / len(gateways)
+                            if gateways else 0.0),
+            "simulated_time": duration,
+            "stop_reason": "simulation_time",
+        }
+        if self.topology is not None:
+            forwarded = sum(r["forwarded"] for r in self.results)
+            delivered = sum(r["delivered"] for r in self.results)
+            network_delay = sum(r["network_delay"] for r in self.results)
+            summary["hops"] = forwarded / arrivals if arrivals else 0.0
+            summary["network_delay"] = network_delay / delivered if delivered else 0.0
+        mu = self.params.get("mu", 8.0)
+        if self.params.get("common_random_numbers") and mu and gateways and duration > 0:
+            offered_work = sum(r["offered_work"] for r in self.results)
+            capacity = mu * self.params.get("num_servers", 1) * len(gateways) * duration
+            summary["offered_load"] = offered_work / capacity
+        return summary
+
+
+def main() -> None:
+    params = {"n_clients": 400, "num_sources": 8, "simulation_time": 200.0, "lam": 1.0,
+              "mu": 60.0, "num_servers": 1, "queue_size": 10, "transmission_delay": 0.05,
+              "seed": 1}
+    n_partitions = int(sys.argv[1]) if len(sys.argv) > 1 else None
+
+    parallel = ParallelEngine(n_partitions=n_partitions, **params)
+    start = time.perf_counter()
+    parallel.Run()
+    parallel_wall = time.perf_counter() - start
+
+    sequential = Engine(trace_sinks=[], store_traces=False, **params)
+    sequential.start_time = parallel.start_time
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        sequential.Run()
+    sequential_wall = time.perf_counter() - start
+
+    expected = sequential.Summary()
+    actual = parallel.Summary()
+    print(f"{parallel.n_partitions} partitions, {parallel.n_windows} windows, "
+          f"{parallel.n_remote} cross-partition messages")
+    print(f"sequential {sequential_wall:.2f}s, parallel {parallel_wall:.2f}s")
+    for name, value in expected.items():
+        flag = "" if actual[name] == value else "  MISMATCH"
+        print(f"{name:>16} | {value!s:>22} | {actual[name]!s:>22}{flag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import json
+import sys
+import time
+
+from Message import Message
+from Event import Event, EventType
+
+
+class ProfiledScheduler:
+    """
+    Scheduler proxy that times add_event/get_event and tracks the peak
+    future-event-list size.  Installed only while a Profiler is attached.
+    """
+    __slots__ = ("inner", "profiler")
+
+    def __init__(self, inner, profiler: "Profiler"):
+        self.inner = inner
+        self.profiler = profiler
+
+    def add_event(self, event) -> None:
+        p = self.profiler
+        start = time.perf_counter()
+        self.inner.add_event(event)
+        p.push_time += time.perf_counter() - start
+        p.pushes += 1
+        size = len(self.inner)
+        if size > p.peak_fel:
+            p.peak_fel = size
+
+    def get_event(self):
+        p = self.profiler
+        start = time.perf_counter()
+        event = self.inner.get_event()
+        p.pop_time += time.perf_counter() - start
+        p.pops += 1
+        return event
+
+    def get_current_time(self):
+        return self.inner.get_current_time()
+
+    def __len__(self) -> int:
+        return len(self.inner)
+
+
+class Profiler:
+    """
+    Hot-path instrumentation for Engine.Run.
+
+    While attached, every handler in Engine.handlers is wrapped to count
+    calls, wall time and the Messages and Events allocated per event
+    type, and the scheduler is replaced by a ProfiledScheduler.  Nothing
+    is wrapped when an Engine has no profiler, so the disabled case runs
+    the plain loop.  Handler time includes the scheduler inserts the
+    handler makes.
+
+    Methods:
+    +----------------------+--------------------------------------------------+
+    | attach / detach      | Install and remove the instrumentation           |
+    | report               | All measurements as a dict                       |
+    | progress_line        | One-line summary, also printed periodically      |
+    | export_chrome_trace  | Write handler spans as Chrome trace-event JSON   |
+    +----------------------+--------------------------------------------------+
+    """
+    def __init__(self, progress_interval: float = None, trace_limit: int = 0, out=None):
+        """
+        Args:
+            progress_interval (float): Print progress_line() every this
+                many wall-clock seconds; None disables it
+            trace_limit (int): Handler spans kept for export_chrome_trace;
+                0 keeps none
+            out: Stream for progress lines; defaults to sys.stdout
+        """
+        self.progress_interval = progress_interval
+        self.trace_limit = trace_limit
+        self.out = out
+        self.engine = None
+
+        self.calls = [0] * len(EventType)
+        self.handler_time = [0.0] * len(EventType)
+        self.messages = [0] * len(EventType)
+        self.events = [0] * len(EventType)
+        self.pushes = 0
+        self.pops = 0
+        self.push_time = 0.0
+        self.pop_time = 0.0
+        self.peak_fel = 0
+        self.sim_time = None  # event time of the last handled event
+        self.wall_time = 0.0
+        self.spans = []  # (event type, start, duration, simulation time)
+
+        self._started = None
+        self._origin = time.perf_counter()
+        self._next_progress = None
+
+    def attach(self, engine) -> None:
+        """Wrap engine's handlers and scheduler; called by Engine.Run."""
+        self.engine = engine
+        engine.handlers = [self._wrap(code, handler) for code, handler in enumerate(engine.handlers)]
+        engine.scheduler = ProfiledScheduler(engine.scheduler, self)
+        self._started = time.perf_counter()
+        if self.progress_interval:
+            self._next_progress = self._started + self.progress_interval
+
+    def detach(self, engine) -> None:
+        """Restore the plain handlers and scheduler."""
+        self.wall_time += time.perf_counter() - self._started
+        engine.scheduler = self.unwrap(engine.scheduler)
+        engine.BuildHandlers()
+
+    @staticmethod
+    def unwrap(scheduler):
+        """The real Scheduler behind a ProfiledScheduler (or scheduler itself)."""
+        return scheduler.inner if isinstance(scheduler, ProfiledScheduler) else scheduler
+
+    def _wrap(self, code: int, handler):
+        calls, handler_time = self.calls, self.handler_time
+        messages, events, spans = self.messages, self.events, self.spans
+        perf_counter = time.perf_counter
+
+        def profiled(evt):
+            n_msg = Message._id_counter
+            n_evt = Event._id_counter
+            start = perf_counter()
+            handler(evt)
+            end = perf_counter()
+            calls[code] += 1
+            handler_time[code] += end - start
+            messages[code] += Message._id_counter - n_msg
+            events[code] += Event._id_counter - n_evt
+            self.sim_time = evt.event_time
+            if len(spans) < self.trace_limit:
+                spans.append((code, start, end - start, evt.event_time))
+            if self._next_progress is not None and end >= self._next_progress:
+                self._next_progress = end + self.progress_interval
+                print(self.progress_line(), file=self.out or sys.stdout)
+        return profiled
+
+    def _elapsed(self) -> float:
+        if self.engine is not None and isinstance(self.engine.scheduler, ProfiledScheduler):
+            return self.wall_time + time.perf_counter() - self._started
+        return self.wall_time
+
+    def report(self) -> dict:
+        """
+        Returns:
+            dict: "events", "wall_time", "events_per_sec", "peak_fel",
+                "scheduler" (push/pop counts and seconds) and "handlers",
+                per event type name: calls, time, mean_us and the
+                messages and events allocated
+        """
+        total = sum(self.calls)
+        wall = self._elapsed()
+        handlers = {}
+        for t in EventType:
+            c = self.calls[t.value]
+            handlers[t.name] = {
+                "calls": c,
+                "time": self.handler_time[t.value],
+                "mean_us": self.handler_time[t.value] / c * 1e6 if c else 0.0,
+                "messages": self.messages[t.value],
+                "events": self.events[t.value],
+            }
+        return {
+            "events": total,
+            "wall_time": wall,
+            "events_per_sec": total / wall if wall > 0 else 0.0,
+            "peak_fel": self.peak_fel,
+            "scheduler": {"pushes": self.pushes, "push_time": self.push_time,
+                          "pops": self.pops, "pop_time": self.pop_time},
+            "handlers": handlers,
+        }
+
+    def progress_line(self) -> str:
+        total = sum(self.calls)
+        wall = self._elapsed()
+        rate = total / wall if wall > 0 else 0.0
+        sim = ""
+        if self.engine is not None and self.sim_time is not None:
+            sim = f"sim t={self.sim_time - self.engine.start_time:.2f} "
+        fel = len(self.engine.scheduler) if self.engine is not None else 0
+        return (f"[profile] {sim}wall {wall:.1f}s events {total:,} "
+                f"({rate:,.0f}/s) fel {fel} (peak {self.peak_fel})")
+
+    def export_chrome_trace(self, path: str) -> None:
+        """
+        Write the recorded handler spans as Chrome trace-event JSON
+        (viewable in chrome://tracing or Perfetto), one complete ("X")
+        event per handler call with its simulation time in args.
+        """
+        names = [t.name for t in EventType]
+        trace = [{"name": names[code], "cat": "handler", "ph": "X",
+                  "ts": (start - self._origin) * 1e6, "dur": duration * 1e6,
+                  "pid": 0, "tid": 0, "args": {"sim_time": sim_time}}
+                 for code, start, duration, sim_time in self.spans]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
@@ -1,15 +1,40 @@
 class Queue:
-    def __init__(self, sizeQueue: int, numMsg: int):
+    def __init__(self, sizeQueue: int, numMsg: int = 0):
         """
         Initialize a Queue object.
 
+        The queue is a fixed-capacity ring buffer: storage for `sizeQueue`
+        messages is allocated once, and add/remove only move the head and
+        tail indices, so both are O(1) regardless of queue length.
+
         Args:
             sizeQueue (int): The maximum size of the queue
-            numMsg (int): The current number of messages in the queue
+            numMsg (int): The current number of messages in the queue.
+                Kept for compatibility; a new queue is always empty, so
+                this must be 0.
         """
+        if sizeQueue < 0:
+            raise ValueError("sizeQueue must be non-negative")
+        if numMsg != 0:
+            raise ValueError("a new Queue starts empty; numMsg must be 0")
         self.sizeQueue = sizeQueue
-        self.numMsg = numMsg
-        self.messages = []
+        self.messages = [None] * sizeQueue
+        self._head = 0   # index of the oldest message
+        self._count = 0
+
+    @property
+    def numMsg(self) -> int:
+        """The current number of messages in the queue."""
+        return self._count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def isFull(self) -> bool:
+        return self._count == self.sizeQueue
+
+    def isEmpty(self) -> bool:
+        return self._count == 0
 
     def addMsg(self, message) -> int:
         """
@@ -23,12 +48,31 @@ class Queue:
             int: 1 if the message was added, 0 otherwise
         """
         # Only add the message if the queue is not full
-        if len(self.messages) < self.sizeQueue:
-            # Add the new message
-            self.messages.append(message)
-            self.numMsg += 1
-            return 1
-        return 0
+        if self._count == self.sizeQueue:
+            return 0
+        tail = self._head + self._count
+        if tail >= self.sizeQueue:
+            tail -= self.sizeQueue
+        self.messages[tail] = message
+        self._count += 1
+        return 1
+
+    def addMany(self, messages) -> int:
+        """
+        Add messages in order until the queue is full.
+
+        Args:
+            messages: Iterable of messages to add
+
+        Returns:
+            int: The number of messages added; the rest were not queued
+        """
+        added = 0
+        for message in messages:
+            if not self.addMsg(message):
+                break
+            added += 1
+        return added
 
     def getMsg(self):
         """
@@ -38,7 +82,51 @@ class Queue:
         Returns:
             The first message in the queue or None if empty
         """
-        if self.numMsg > 0 and len(self.messages) > 0:
-            self.numMsg -= 1
-            return self.messages.pop(0)
-        return None
+        if self._count == 0:
+            return None
+        message = self.messages[self._head]
+        # drop the reference so the buffer does not keep messages alive
+        self.messages[self._head] = None
+        self._head += 1
+        if self._head == self.sizeQueue:
+            self._head = 0
+        self._count -= 1
+        return message
+
+    def peekMsg(self):
+        """
+        Return the first message in the queue without removing it.
+
+        Returns:
+            The first message in the queue or None if empty
+        """
+        if self._count == 0:
+            return None
+        return self.messages[self._head]
+
+    def drainUpTo(self, n: int) -> list:
+        """
+        Remove and return up to `n` messages in FIFO order.
+
+        Args:
+            n (int): The maximum number of messages to remove
+
+        Returns:
+            list: The removed messages, oldest first
+        """
+        n = min(n, self._count)
+        if n <= 0:
+            return []
+        head = self._head
+        end = head + n
+        if end <= self.sizeQueue:
+            drained = self.messages[head:end]
+            self.messages[head:end] = [None] * n
+        else:
+            end -= self.sizeQueue
+            drained = self.messages[head:] + self.messages[:end]
+            self.messages[head:] = [None] * (self.sizeQueue - head)
+            self.messages[:end] = [None] * end
+        self._head = end if end < self.sizeQueue else 0
+        self._count -= n
+        return drained
@@ -0,0 +1,161 @@
+import numpy as np
+
+# Stream families; a stream is identified by its family and an index tuple,
+# e.g. ("client", 4) or ("server", gateway, server).
+STREAM_KINDS = {"client": 0, "server": 1, "routing": 2, "aggregate": 3, "lindley": 4,
+                "service": 5}
+
+# How variates are generated: "native" uses NumPy's fastest samplers;
+# "inversion" maps every uniform U through the inverse CDF and
+# "antithetic" does the same with 1 - U, so a run in each of the two
+# modes with the same seed forms an antithetic pair
+VARIATES = ("native", "inversion", "antithetic")
+
+
+class RandomStream:
+    """
+    Buffered source of random variates backed by one numpy.random.Generator.
+
+    Variates are drawn from the generator in blocks of `block_size` and
+    handed out one at a time from a Python list, so each sample costs a
+    list index instead of a call into NumPy.  The method names mirror the
+    `random` module (expovariate, random, choice, randrange), so either
+    can be used wherever a component takes a `stream`.
+
+    Pickling saves the generator state each buffer was drawn from instead
+    of the buffer itself, so a checkpoint holds a few hundred bytes per
+    stream whatever the block size; unpickling draws the blocks again.
+    """
+    __slots__ = ("generator", "block_size", "variates", "_exp", "_exp_pos", "_uni", "_uni_pos",
+                 "_exp_state", "_uni_state")
+
+    def __init__(self, generator: np.random.Generator, block_size: int = 4096,
+                 variates: str = "native"):
+        if block_size <= 0:
+            raise ValueError("block_size must be positive")
+        if variates not in VARIATES:
+            raise ValueError(f"unknown variates {variates!r}; expected one of {VARIATES}")
+        self.generator = generator
+        self.block_size = block_size
+        self.variates = variates
+        self._exp = []
+        self._exp_pos = 0
+        self._uni = []
+        self._uni_pos = 0
+        # generator state before each buffer was drawn, see __getstate__
+        self._exp_state = None
+        self._uni_state = None
+
+    def expovariate(self, lambd: float) -> float:
+        """Exponential variate with rate `lambd` (mean 1/lambd)."""
+        if self._exp_pos == len(self._exp):
+            self._exp_state = self.generator.bit_generator.state
+            self._exp = self._exponentials().tolist()
+            self._exp_pos = 0
+        value = self._exp[self._exp_pos]
+        self._exp_pos += 1
+        return value / lambd
+
+    def random(self) -> float:
+        """Uniform variate in [0, 1)."""
+        if self._uni_pos == len(self._uni):
+            self._uni_state = self.generator.bit_generator.state
+            self._uni = self._uniforms().tolist()
+            self._uni_pos = 0
+        value = self._uni[self._uni_pos]
+        self._uni_pos += 1
+        return value
+
+    def reseed(self, seed, block_size: int = None) -> None:
+        """
+        Continue from a fresh generator seeded by `seed`, dropping any
+        buffered variates; used to decorrelate copies of a saved state.
+        """
+        self.generator = np.random.Generator(np.random.PCG64(seed))
+        if block_size is not None:
+            self.block_size = block_size
+        self._exp = []
+        self._exp_pos = 0
+        self._uni = []
+        self._uni_pos = 0
+        self._exp_state = None
+        self._uni_state = None
+
+    def __getstate__(self) -> dict:
+        return {"bit_generator": type(self.generator.bit_generator).__name__,
+                "state": self.generator.bit_generator.state,
+                "block_size": self.block_size,
+                "variates": self.variates,
+                "exp": (self._exp_state, len(self._exp), self._exp_pos),
+                "uni": (self._uni_state, len(self._uni), self._uni_pos)}
+
+    def __setstate__(self, state: dict) -> None:
+        self.generator = np.random.Generator(getattr(np.random, state["bit_generator"])())
+        self.block_size = state["block_size"]
+        self.variates = state["variates"]
+        # draw each buffer again from the state it was first drawn from
+        self._exp_state, size, self._exp_pos = state["exp"]
+        self._exp = []
+        if size:
+            self.generator.bit_generator.state = self._exp_state
+            self._exp = self._exponentials()[:size].tolist()
+        self._uni_state, size, self._uni_pos = state["uni"]
+        self._uni = []
+        if size:
+            self.generator.bit_generator.state = self._uni_state
+            self._uni = self._uniforms()[:size].tolist()
+        self.generator.bit_generator.state = state["state"]
+
+    def _exponentials(self) -> np.ndarray:
+        """A block of standard exponentials."""
+        if self.variates == "native":
+            return self.generator.standard_exponential(self.block_size)
+        # -log(1 - U), and -log(U) for the antithetic twin
+        return -np.log1p(-self._uniforms())
+
+    def _uniforms(self) -> np.ndarray:
+        """A block of uniforms in [0, 1), reflected to 1 - U in antithetic mode."""
+        u = self.generator.random(self.block_size)
+        if self.variates == "antithetic":
+            u = 1.0 - u
+            u[u >= 1.0] = 0.0  # keep [0, 1) for U == 0 exactly
+        return u
+
+    def choice(self, seq):
+        """Uniformly chosen element of the non-empty sequence `seq`."""
+        return seq[int(self.random() * len(seq))]
+
+    def randrange(self, start: int, stop: int) -> int:
+        """Uniformly chosen integer in [start, stop)."""
+        return start + int(self.random() * (stop - start))
+
+
+class RandomStreams:
+    """
+    Factory of independent, reproducible RandomStreams derived from one seed.
+
+    Each stream's generator is seeded from the root SeedSequence with a
+    spawn key built from the stream's family and index, so the stream a
+    component receives depends only on (seed, family, index) and not on
+    how many other streams were created before it.
+    """
+    def __init__(self, seed=None, block_size: int = 4096, variates: str = "native"):
+        """
+        Args:
+            seed: int, None (fresh OS entropy) or a numpy SeedSequence
+            block_size (int): Number of variates drawn per refill
+            variates (str): "native", "inversion" or "antithetic"; see VARIATES
+        """
+        if isinstance(seed, np.random.SeedSequence):
+            self.seed_seq = seed
+        else:
+            self.seed_seq = np.random.SeedSequence(seed)
+        self.block_size = block_size
+        self.variates = variates
+
+    def stream(self, kind: str, *index: int) -> RandomStream:
+        """Return the stream for family `kind` ("client", "server", ...) and `index`."""
+        key = self.seed_seq.spawn_key + (STREAM_KINDS[kind],) + tuple(index)
+        seq = np.random.SeedSequence(self.seed_seq.entropy, spawn_key=key)
+        return RandomStream(np.random.Generator(np.random.PCG64(seq)), self.block_size,
+                            self.variates)
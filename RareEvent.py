@@ -0,0 +1,337 @@
+import contextlib
+import io
+import math
+import time
+
+import numpy as np
+
+import Checkpoint
+from Engine import Engine
+from Event import EventType
+from RandomStreams import RandomStream, RandomStreams
+from Client import AggregateClient
+from OnlineStats import t_quantile
+
+# Variates buffered per stream in splitting runs.  Restoring a snapshot
+# draws the buffers again and clones discard them, so they are kept small
+BLOCK_SIZE = 64
+
+
+def engine_streams(engine: Engine) -> list:
+    """Every RandomStream the clients and servers of a started engine draw from."""
+    streams = []
+    for client in engine.clients:
+        streams.append(client.stream)
+        streams.append(client.work_stream)
+    for gateway in engine.gateways.values():
+        for server in gateway.servers:
+            streams.append(server.stream)
+    return [s for s in streams if isinstance(s, RandomStream)]
+
+
+# Resolution of service times (Server.BeginService rounds them)
+SERVICE_STEP = 0.01
+
+
+def redraw_pending(engine: Engine, now: float) -> None:
+    """
+    Draw the pending client sends and departures of an engine again.
+
+    Both are drawn from the law they have given the past, so the law of
+    the run is unchanged:
+
+    - a client's inter-arrival time is exponential, so the time to its
+      next send is Exp(rate) from `now` whenever it last sent;
+    - a service time is S = round(X, 2) with X ~ Exp(mu).  Service that
+      started at t0 and is still going on has S > now - t0, i.e. X at
+      least the lower edge x0 of the first rounding interval above
+      now - t0, and then X = x0 + Exp(mu).
+
+    Draws come from the components' own (reseeded) streams.  Services
+    whose length was fixed by the message (common random numbers) and
+    events at `now` itself are kept as they are.
+    """
+    scheduler = engine.scheduler
+    events = []
+    while scheduler.get_current_time() is not None:
+        events.append(scheduler.get_event())
+    send = EventType.SEND_MSG.value
+    dept = EventType.MSG_DEPT.value
+    for evt in events:
+        msg = evt.message
+        if evt.event_type == send:
+            client = engine.pending_sends.get(msg.message_id)
+            if client is not None:
+                rate = client.get_rate() if isinstance(client, AggregateClient) else client.lam
+                evt.event_time = msg.timestamp = now + client.stream.expovariate(rate)
+        elif evt.event_type == dept and msg.work is None and evt.event_time > now:
+            start = msg.service_time
+            server = engine.gateways[msg.destination].servers[msg.server]
+            x0 = (math.floor((now - start) / SERVICE_STEP) + 0.5) * SERVICE_STEP
+            service = (x0 + server.stream.expovariate(server.mu)).__round__(2)
+            if start + service > now:
+                evt.event_time = start + service
+        scheduler.add_event(evt)
+
+
+def clone(blob: bytes, seed: np.random.SeedSequence, block_size: int = BLOCK_SIZE,
+          now: float = None) -> Engine:
+    """
+    Independent continuation of a snapshotted Engine.
+
+    The copy is restored from `blob` and all its streams are reseeded
+    from children of `seed`, so copies of one state evolve independently
+    (restoring alone would replay the same future in every copy).  With
+    `now`, the time of the snapshot, the pending client sends and
+    departures are drawn again as well (see redraw_pending); otherwise
+    every copy shares them.
+    """
+    engine = Checkpoint.restore(blob)
+    streams = engine_streams(engine)
+    for stream, child in zip(streams, seed.spawn(len(streams))):
+        stream.reseed(child, block_size)
+    if now is not None:
+        redraw_pending(engine, now)
+    return engine
+
+
+class ImportanceSplitting:
+    """
+    Fixed-effort multilevel splitting for the drop probability of one
+    gateway.
+
+    The importance function is the gateway's queue occupancy
+    (Queue.numMsg) and time is cut into busy cycles, from an arrival to
+    an empty gateway until it is empty again; with Poisson clients every
+    cycle is an independent trial.  Writing D for the drops of a cycle
+    and A for its arrivals, the long-run drop probability is E[D] / E[A].
+    E[A] is not rare and is measured by plain simulation; E[D] is
+    estimated by splitting over the levels l_1 < ... < l_m = queue_size:
+
+    - stage 0 simulates `effort` cycles plainly, counts the fraction p_0
+      that reach l_1 and snapshots the state at each first crossing;
+    - stage k restarts `effort` trajectories from those entrance states
+      (used in turn, each copy with fresh random streams, see clone) and
+      runs each until the queue reaches l_(k+1) or the gateway empties;
+      p_k is the fraction that got there, whose states seed stage k + 1;
+    - the last stage runs from full-queue states to the end of the cycle
+      and averages the drops.
+
+    The product p_0 ... p_(m-1) is an unbiased estimate of the overflow
+    probability of a cycle and its product with the mean drops an
+    unbiased estimate of E[D].  estimate() repeats the whole procedure
+    to give intervals and relative errors.
+
+    Copies of one state draw its pending sends and departures again
+    (see redraw_pending).  Sharing them would fix the next events of
+    every copy, so the copies of a state would mostly rise or fall
+    together and deep levels would be reached from very few distinct
+    states.
+    """
+    def __init__(self, params: dict, gateway: str = "1", levels=None, effort: int = 1000,
+                 seed=None):
+        """
+        Args:
+            params (dict): Engine keyword arguments; simulation_time is
+                ignored and traces are disabled
+            gateway (str): Id of the gateway whose drops are estimated
+            levels: Increasing queue occupancies, ending at queue_size
+                (appended if missing); default every occupancy 1..queue_size
+            effort (int): Trajectories (stage 0: cycles) per stage
+            seed: Root seed of all runs
+        """
+        params = dict(params)
+        for name in ("stop_targets", "checkpoint_path", "replay_trace", "profiler"):
+            if params.get(name):
+                raise ValueError(f"{name} is not supported by ImportanceSplitting")
+        params["simulation_time"] = math.inf
+        params["trace_sinks"] = []
+        params["store_traces"] = False
+        queue_size = params.get("queue_size", 10)
+        if queue_size < 1:
+            raise ValueError("importance splitting needs queue_size >= 1")
+        levels = list(levels) if levels is not None else list(range(1, queue_size + 1))
+        if not levels or levels[-1] != queue_size:
+            levels.append(queue_size)
+        if levels[0] < 1 or any(b <= a for a, b in zip(levels, levels[1:])):
+            raise ValueError("levels must increase from at least 1 up to queue_size")
+        if effort <= 0:
+            raise ValueError("effort must be positive")
+        self.params = params
+        self.gateway = str(gateway)
+        self.levels = levels
+        self.effort = effort
+        self.seed_seq = np.random.SeedSequence(seed)
+
+    def _is_empty(self, gateway) -> bool:
+        return gateway.queue.numMsg == 0 and gateway.getNumIdleServers() == gateway.numServers
+
+    def _advance(self, engine: Engine, level: int):
+        """
+        Run until the queue reaches `level` or the gateway empties.
+
+        Returns:
+            float: Time at which the level was reached, or None if the
+                gateway emptied first
+        """
+        gateway = engine.gateways[self.gateway]
+        queue = gateway.queue
+        events = engine.EventLoop()
+        try:
+            for evt in events:
+                if queue.numMsg >= level:
+                    return evt.event_time
+                if self._is_empty(gateway):
+                    return None
+            raise RuntimeError("the simulation ran out of events")
+        finally:
+            events.close()
+
+    def _drops_until_empty(self, engine: Engine) -> int:
+        """Run to the end of the current cycle; returns the drops on the way."""
+        gateway = engine.gateways[self.gateway]
+        before = gateway.totalMessagesDropped
+        self._advance(engine, math.inf)
+        return gateway.totalMessagesDropped - before
+
+    def _first_stage(self, seed: np.random.SeedSequence) -> tuple:
+        """
+        Plain simulation of `effort` cycles.
+
+        Returns:
+            tuple: (arrivals per cycle, fraction of cycles reaching the first
+                level, (snapshot, time) at those crossings)
+        """
+        engine = Engine(seed=seed, **self.params)
+        engine.streams = RandomStreams(seed, block_size=BLOCK_SIZE,
+                                       variates=engine.streams.variates)
+        level = self.levels[0]
+        # arrivals are counted when sent: in topology runs a message has a
+        # RECV_MSG at every node on its way
+        send = EventType.SEND_MSG.value
+        cycles = arrivals = 0
+        busy = crossed = False
+        states = []
+        events = engine.EventLoop()
+        try:
+            gateway = None
+            for evt in events:
+                if gateway is None:
+                    gateway = engine.gateways[self.gateway]
+                if evt.event_type == send and evt.message.destination == self.gateway:
+                    arrivals += 1
+                if self._is_empty(gateway):
+                    if busy:
+                        busy = False
+                        cycles += 1
+                        if cycles == self.effort:
+                            break
+                    continue
+                if not busy:
+                    busy, crossed = True, False
+                if not crossed and gateway.queue.numMsg >= level:
+                    crossed = True
+                    states.append((Checkpoint.snapshot(engine), evt.event_time))
+        finally:
+            events.close()
+        return arrivals / cycles, len(states) / cycles, states
+
+    def run(self, seed=None) -> dict:
+        """
+        One splitting estimate.
+
+        Returns:
+            dict: "drop_probability", "drops_per_cycle",
+                "overflow_probability" (a cycle reaches a full queue),
+                "arrivals_per_cycle", "stage_probabilities" and "trajectories"
+        """
+        seed = seed if seed is not None else self.seed_seq.spawn(1)[0]
+        first_seed, clone_seeds = seed.spawn(2)
+        with contextlib.redirect_stdout(io.StringIO()):
+            arrivals_per_cycle, p, states = self._first_stage(first_seed)
+            stage_probabilities = [p]
+            trajectories = self.effort
+            for level in self.levels[1:]:
+                if not states:
+                    break
+                hits = []
+                for i in range(self.effort):
+                    blob, now = states[i % len(states)]
+                    engine = clone(blob, clone_seeds.spawn(1)[0], now=now)
+                    reached = self._advance(engine, level)
+                    if reached is not None:
+                        hits.append((Checkpoint.snapshot(engine), reached))
+                trajectories += self.effort
+                stage_probabilities.append(len(hits) / self.effort)
+                states = hits
+            drops = 0.0
+            if states:
+                total = 0
+                for i in range(self.effort):
+                    blob, now = states[i % len(states)]
+                    engine = clone(blob, clone_seeds.spawn(1)[0], now=now)
+                    total += self._drops_until_empty(engine)
+                trajectories += self.effort
+                drops = total / self.effort
+
+        overflow = math.prod(stage_probabilities) if states else 0.0
+        drops_per_cycle = overflow * drops
+        return {
+            "drop_probability": drops_per_cycle / arrivals_per_cycle,
+            "drops_per_cycle": drops_per_cycle,
+            "overflow_probability": overflow,
+            "arrivals_per_cycle": arrivals_per_cycle,
+            "stage_probabilities": stage_probabilities,
+            "trajectories": trajectories,
+        }
+
+    def estimate(self, repetitions: int = 10, level: float = 0.95) -> dict:
+        """
+        Independent repetitions of run() combined into confidence intervals.
+
+        Returns:
+            dict: metric -> (mean, half_width, relative_error) for
+                "drop_probability", "drops_per_cycle" and
+                "overflow_probability", relative_error being the standard
+                error over the mean; plus "runs", the individual results
+        """
+        runs = [self.run(seed) for seed in self.seed_seq.spawn(repetitions)]
+        result = {"runs": runs}
+        for name in ("drop_probability", "drops_per_cycle", "overflow_probability"):
+            values = np.array([r[name] for r in runs])
+            mean = float(values.mean())
+            if repetitions < 2:
+                result[name] = (mean, math.inf, math.inf)
+                continue
+            std_err = float(values.std(ddof=1)) / math.sqrt(repetitions)
+            result[name] = (mean,
+                            t_quantile(0.5 + level / 2, repetitions - 1) * std_err,
+                            std_err / mean if mean > 0 else math.inf)
+        return result
+
+
+def main() -> None:
+    from Analytics import mmck
+
+    params = {"n_clients": 4, "num_sources": 1, "lam": 0.125, "mu": 1.0,
+              "num_servers": 1, "queue_size": 20}
+    expected = mmck(0.5, 1.0, 1, 20)["blocking"]
+    splitting = ImportanceSplitting(params, effort=100, seed=1)
+    start = time.perf_counter()
+    report = splitting.estimate(repetitions=10)
+    elapsed = time.perf_counter() - start
+
+    mean, half_width, relative_error = report["drop_probability"]
+    trajectories = sum(r["trajectories"] for r in report["runs"])
+    arrivals = report["runs"][0]["arrivals_per_cycle"]
+    print(f"M/M/1/21 at load 0.5, {len(report['runs'])} splitting runs in {elapsed:.1f}s "
+          f"({trajectories:,} trajectories)")
+    print(f"drop probability: {mean:.4g} ± {half_width:.2g} "
+          f"(relative error {relative_error:.1%}), M/M/c/K: {expected:.4g}")
+    print(f"plain simulation needs about {1 / (expected * relative_error ** 2):.2g} arrivals "
+          f"(~{1 / (expected * relative_error ** 2) / arrivals:.2g} cycles) for the same "
+          f"relative error")
+
+
+if __name__ == "__main__":
+    main()
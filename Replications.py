@@ -0,0 +1,158 @@
+import contextlib
+import io
+import math
+import os
+from multiprocessing import Pool
+
+import numpy as np
+
+from Message import Message
+from Event import Event
+from Client import Client
+from Trace import Trace
+from Engine import Engine
+from OnlineStats import t_quantile
+
+
+def reset_counters() -> None:
+    """
+    Reset the class-level id counters of Message, Event, Client and Trace.
+
+    Pool workers run many replications one after another, and these
+    counters would otherwise carry over from one run into the next.
+    """
+    Message._id_counter = 0
+    Event._id_counter = 0
+    Client._id_counter = 0
+    Trace._id_counter = 0
+
+
+def replication_seeds(seed, n: int) -> list:
+    """
+    n non-overlapping seeds for n replications.
+
+    The replications get the children of SeedSequence(seed), so their
+    random streams are statistically independent and a given
+    (seed, replication index) always gives the same run.
+    """
+    return np.random.SeedSequence(seed).spawn(n)
+
+
+def run_replication(task) -> tuple:
+    """
+    Run one isolated replication; the process pool's unit of work.
+
+    Args:
+        task: (index, seed, params, summarize), where params are Engine
+            keyword arguments and summarize maps the finished Engine to
+            a dict of metrics (None means Engine.Summary)
+
+    Returns:
+        tuple: (index, summary dict)
+    """
+    index, seed, params, summarize = task
+    reset_counters()
+    params = dict(params)
+    params.setdefault("trace_sinks", [])
+    params.setdefault("store_traces", False)
+    engine = Engine(seed=seed, **params)
+    # CreateClients and friends report progress on stdout
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.Run()
+    summary = engine.Summary() if summarize is None else summarize(engine)
+    return index, summary
+
+
+def replicate(n: int, params: dict = None, seed=None, processes: int = None,
+              summarize=None):
+    """
+    Run n independent replications of Engine across a process pool.
+
+    Summaries are yielded as soon as each replication finishes, so in
+    completion order rather than index order.
+
+    Args:
+        n (int): Number of replications
+        params (dict): Engine keyword arguments shared by all replications
+        seed: Root seed; replication i gets the i-th child seed
+        processes (int): Pool size; defaults to os.cpu_count(), 1 runs
+            in-process without a pool
+        summarize: Picklable callable mapping a finished Engine to a dict
+            of metrics; defaults to Engine.Summary
+
+    Yields:
+        tuple: (replication index, summary dict)
+    """
+    params = params or {}
+    tasks = [(i, s, params, summarize)
+             for i, s in enumerate(replication_seeds(seed, n))]
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        for task in tasks:
+            yield run_replication(task)
+        return
+    with Pool(processes=min(processes, n)) as pool:
+        for result in pool.imap_unordered(run_replication, tasks):
+            yield result
+
+
+def confidence_interval(samples, level: float = 0.95) -> tuple:
+    """
+    Student-t confidence interval for the mean of i.i.d. samples.
+
+    Returns:
+        tuple: (mean, half_width); half_width is inf with fewer than two samples
+    """
+    samples = np.asarray(samples, dtype=float)
+    mean = float(samples.mean())
+    if len(samples) < 2:
+        return mean, math.inf
+    std_err = float(samples.std(ddof=1)) / math.sqrt(len(samples))
+    return mean, t_quantile(0.5 + level / 2, len(samples) - 1) * std_err
+
+
+def summarize_replications(summaries, level: float = 0.95) -> dict:
+    """
+    Combine per-replication summaries into per-metric confidence intervals.
+
+    Args:
+        summaries: Iterable of summary dicts (or (index, summary) pairs
+            as yielded by replicate)
+        level (float): Confidence level
+
+    Returns:
+        dict: metric name -> (mean, half_width) for every numeric metric
+    """
+    columns = {}
+    for summary in summaries:
+        if isinstance(summary, tuple):
+            summary = summary[1]
+        for name, value in summary.items():
+            # non-numeric entries such as Engine's stop_reason are not averaged
+            if isinstance(value, (int, float)):
+                columns.setdefault(name, []).append(value)
+    return {name: confidence_interval(values, level)
+            for name, values in columns.items()}
+
+
+def print_report(report: dict, n: int, level: float = 0.95) -> None:
+    """Print the output of summarize_replications as a table."""
+    print(f"{n} replications, {level:.0%} confidence intervals")
+    print(f"{'metric':>16} | {'mean':>14} | {'half-width':>12}")
+    for name, (mean, half_width) in report.items():
+        print(f"{name:>16} | {mean:>14.6g} | {half_width:>12.6g}")
+
+
+def main() -> None:
+    n = 30
+    params = {"n_clients": 3, "simulation_time": 10.0, "lam": 1.0}
+    summaries = []
+    for index, summary in replicate(n, params, seed=1):
+        print(f"replication {index:>3}: {summary}")
+        summaries.append(summary)
+    print()
+    print_report(summarize_replications(summaries), n)
+
+
+if __name__ == "__main__":
+    main()
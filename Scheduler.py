@@ -1,49 +1,293 @@
 from __future__ import annotations
 
+import bisect
+import heapq
+import itertools
+import math
+
 from Event import Event
 
-class Scheduler:
+
+class SchedulerBackend:
     """
-    Scheduler for events: maintains a chronological queue of Event objects.
+    Interface for future-event list implementations used by Scheduler.
+
+    A backend stores Events keyed by event_time and must return events
+    with equal event_time in insertion (FIFO) order.
 
     Methods:
-    +--------------+----------------------------------------------------------+
-    | __init__     | Initialize empty event list                              |
-    | add_event    | Insert an Event into the list in ascending time order    |
-    | get_event    | Pop and return the next Event (earliest time)            |
-    | get_current_time | Peek at the next Event’s timestamp                   |
-    +--------------+----------------------------------------------------------+
+    +------------+------------------------------------------------------------+
+    | push       | Insert an Event at the given time                          |
+    | pop        | Remove and return the earliest Event, or None if empty     |
+    | peek_time  | Return the earliest event_time, or None if empty           |
+    | __len__    | Number of pending events                                   |
+    +------------+------------------------------------------------------------+
     """
+    def push(self, event_time: float, event: Event) -> None:
+        raise NotImplementedError
+
+    def pop(self) -> Event | None:
+        raise NotImplementedError
+
+    def peek_time(self) -> float | None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __getstate__(self) -> dict:
+        # itertools.count pickling is deprecated; store the next sequence
+        # number instead (skipping one keeps the order of later pushes)
+        state = self.__dict__.copy()
+        if "_seq" in state:
+            state["_seq"] = next(self._seq)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        if "_seq" in state:
+            state["_seq"] = itertools.count(state["_seq"])
+        self.__dict__.update(state)
+
+
+class ListBackend(SchedulerBackend):
+    """Sorted Python list with linear insert and pop(0); O(n) reference backend."""
     def __init__(self):
-        self.events: list[Event] = []
+        self.events: list[tuple[float, Event]] = []
 
-    def add_event(self, event: Event) -> None:
-        """Insert `event` so that self.events stays sorted by event_time."""
-        et = event.get_event_time()
+    def push(self, event_time: float, event: Event) -> None:
         # fast path: append if it belongs at the end
-        if not self.events or et >= self.events[-1].get_event_time():
-            self.events.append(event)
+        if not self.events or event_time >= self.events[-1][0]:
+            self.events.append((event_time, event))
             return
         # otherwise find first slot where new event is earlier
         for i, existing in enumerate(self.events):
-            if et < existing.get_event_time():
-                self.events.insert(i, event)
+            if event_time < existing[0]:
+                self.events.insert(i, (event_time, event))
                 return
 
+    def pop(self) -> Event | None:
+        if not self.events:
+            return None
+        return self.events.pop(0)[1]
+
+    def peek_time(self) -> float | None:
+        if not self.events:
+            return None
+        return self.events[0][0]
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+
+class HeapBackend(SchedulerBackend):
+    """
+    Binary heap of (event_time, seq, event) entries; O(log n) push and pop.
+
+    `seq` is a monotonically increasing insertion counter, so ties on
+    event_time pop in FIFO order and Event objects are never compared.
+    """
+    def __init__(self):
+        self.events: list[tuple[float, int, Event]] = []
+        self._seq = itertools.count()
+
+    def push(self, event_time: float, event: Event) -> None:
+        heapq.heappush(self.events, (event_time, next(self._seq), event))
+
+    def pop(self) -> Event | None:
+        if not self.events:
+            return None
+        return heapq.heappop(self.events)[2]
+
+    def peek_time(self) -> float | None:
+        if not self.events:
+            return None
+        return self.events[0][0]
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+
+class CalendarQueueBackend(SchedulerBackend):
+    """
+    Calendar queue (R. Brown, CACM 1988) with automatic resizing.
+
+    Events are hashed into `nbuckets` day-buckets of `width` time units;
+    one "year" is nbuckets * width.  Each bucket is a short sorted list
+    of (event_time, seq, event) entries.  When the population doubles or
+    halves relative to the number of buckets, the calendar is rebuilt
+    with a bucket width estimated from the separation of the earliest
+    pending events, which keeps push and pop amortized O(1) for dense,
+    smoothly distributed event times.
+
+    Days are counted from an origin that moves with the calendar, so
+    large absolute timestamps (epoch seconds) keep their precision when
+    the bucket width is small.
+    """
+    SAMPLE_SIZE = 25
+
+    def __init__(self, nbuckets: int = 2, width: float = 1.0):
+        self._seq = itertools.count()
+        self._size = 0
+        self._setup(nbuckets, width, 0.0)
+
+    def _setup(self, nbuckets: int, width: float, start: float) -> None:
+        self._origin = start
+        self._buckets: list[list[tuple[float, int, Event]]] = [[] for _ in range(nbuckets)]
+        self._nbuckets = nbuckets
+        self._width = width
+        self._grow_at = 2 * nbuckets
+        self._shrink_at = nbuckets // 2 - 2
+        self._seek(start)
+
+    def _seek(self, event_time: float) -> None:
+        """Position the dequeue cursor on the day containing `event_time`."""
+        day = math.floor((event_time - self._origin) / self._width)
+        self._last_time = event_time
+        self._last_bucket = day % self._nbuckets
+        # half a bucket of slack guards against float rounding at the day edge;
+        # the top is kept relative to the origin, like the day numbers
+        self._bucket_top = (day + 1) * self._width + 0.5 * self._width
+
+    def push(self, event_time: float, event: Event) -> None:
+        self._insert((event_time, next(self._seq), event))
+        self._size += 1
+        if self._size > self._grow_at:
+            self._resize(2 * self._nbuckets)
+
+    def _insert(self, entry: tuple[float, int, Event]) -> None:
+        event_time = entry[0]
+        day = math.floor((event_time - self._origin) / self._width)
+        bucket = self._buckets[day % self._nbuckets]
+        if not bucket or entry >= bucket[-1]:
+            bucket.append(entry)
+        else:
+            bisect.insort(bucket, entry)
+        if event_time < self._last_time:
+            # event scheduled in the past of the cursor: move the cursor back
+            self._seek(event_time)
+
+    def pop(self) -> Event | None:
+        if self._size == 0:
+            return None
+
+        buckets = self._buckets
+        origin = self._origin
+        i = self._last_bucket
+        for _ in range(self._nbuckets):
+            bucket = buckets[i]
+            if bucket and bucket[0][0] - origin < self._bucket_top:
+                return self._take(i)
+            i += 1
+            if i == self._nbuckets:
+                i = 0
+            self._bucket_top += self._width
+
+        # Nothing due within one year: jump straight to the minimum.
+        i = min((j for j in range(self._nbuckets) if buckets[j]),
+                key=lambda j: buckets[j][0])
+        self._seek(buckets[i][0][0])
+        return self._take(i)
+
+    def _take(self, i: int) -> Event:
+        entry = self._buckets[i].pop(0)
+        self._last_bucket = i
+        self._last_time = entry[0]
+        self._size -= 1
+        if self._size < self._shrink_at:
+            self._resize(self._nbuckets // 2)
+        return entry[2]
+
+    def peek_time(self) -> float | None:
+        if self._size == 0:
+            return None
+        buckets = self._buckets
+        origin = self._origin
+        i = self._last_bucket
+        top = self._bucket_top
+        for _ in range(self._nbuckets):
+            bucket = buckets[i]
+            if bucket and bucket[0][0] - origin < top:
+                return bucket[0][0]
+            i += 1
+            if i == self._nbuckets:
+                i = 0
+            top += self._width
+        return min(bucket[0][0] for bucket in buckets if bucket)
+
+    def _resize(self, nbuckets: int) -> None:
+        entries = [entry for bucket in self._buckets for entry in bucket]
+        sample = heapq.nsmallest(self.SAMPLE_SIZE, entries)
+        width = self._estimate_width(sample)
+        start = sample[0][0] if sample else self._last_time
+        self._setup(max(nbuckets, 2), width, start)
+        for entry in entries:
+            self._insert(entry)
+
+    def _estimate_width(self, sample: list) -> float:
+        """Three times the average separation of the earliest pending events."""
+        if len(sample) < 2:
+            return self._width
+        gaps = [b[0] - a[0] for a, b in zip(sample, sample[1:])]
+        mean_gap = sum(gaps) / len(gaps)
+        # recompute ignoring outliers, as in Brown's original algorithm
+        close = [g for g in gaps if g <= 2 * mean_gap]
+        if close and sum(close) > 0:
+            return 3.0 * sum(close) / len(close)
+        return self._width
+
+    def __len__(self) -> int:
+        return self._size
+
+
+BACKENDS = {
+    "list": ListBackend,
+    "heap": HeapBackend,
+    "calendar": CalendarQueueBackend,
+}
+
+
+class Scheduler:
+    """
+    Scheduler for events: maintains a chronological queue of Event objects.
+
+    Storage is delegated to a SchedulerBackend chosen by name ("heap",
+    "calendar" or "list") or passed as an instance.  All backends return
+    events with equal event_time in FIFO order.
+
+    Methods:
+    +------------------+------------------------------------------------------+
+    | __init__         | Initialize empty future-event list                   |
+    | add_event        | Insert an Event by its event_time                    |
+    | get_event        | Pop and return the next Event (earliest time)        |
+    | get_current_time | Peek at the next Event’s timestamp                   |
+    | __len__          | Number of pending events                             |
+    +------------------+------------------------------------------------------+
+    """
+    def __init__(self, backend: str | SchedulerBackend = "heap"):
+        if isinstance(backend, str):
+            if backend not in BACKENDS:
+                raise ValueError(f"Unknown scheduler backend {backend!r}; "
+                                 f"expected one of {sorted(BACKENDS)}")
+            backend = BACKENDS[backend]()
+        self.backend = backend
+
+    def add_event(self, event: Event) -> None:
+        """Insert `event`; ties on event_time keep insertion (FIFO) order."""
+        self.backend.push(event.event_time, event)
+
     def get_event(self) -> Event | None:
         """
         Remove and return the earliest Event.
         Returns None if no events are scheduled.
         """
-        if not self.events:
-            return None
-        return self.events.pop(0)
+        return self.backend.pop()
 
     def get_current_time(self) -> float | None:
         """
         Return the timestamp of the next Event without removing it.
         Returns None if the queue is empty.
         """
-        if not self.events:
-            return None
-        return self.events[0].get_event_time()
\ No newline at end of file
+        return self.backend.peek_time()
+
+    def __len__(self) -> int:
+        return len(self.backend)
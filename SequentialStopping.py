@@ -0,0 +1,160 @@
+import math
+
+import numpy as np
+
+from OnlineStats import t_quantile
+
+
+def mser_truncation(batch_means: np.ndarray) -> int:
+    """
+    MSER warm-up truncation point of a series of batch means.
+
+    Returns the number d of leading batches to discard that minimizes
+    the marginal standard error sum((y[d:] - mean(y[d:]))^2) / (n - d)^2,
+    searching d up to n/2 as usual.  Applied to means of 5 observations
+    this is MSER-5.
+    """
+    n = len(batch_means)
+    if n < 2:
+        return 0
+    y = np.asarray(batch_means, dtype=float)
+    # suffix sums of y and y^2 give every candidate's statistic at once
+    s1 = np.cumsum(y[::-1])[::-1]
+    s2 = np.cumsum((y * y)[::-1])[::-1]
+    d = np.arange(n // 2 + 1)
+    m = n - d
+    sse = s2[d] - s1[d] ** 2 / m
+    return int(np.argmin(sse / m ** 2))
+
+
+class BatchMeans:
+    """
+    Incremental batch-means confidence interval with MSER-5 truncation.
+
+    Observations are averaged into batches of `batch_size` (initially 5);
+    once `max_batches` batches exist, adjacent pairs are merged and the
+    batch size doubles, so memory stays bounded.  estimate() drops the
+    MSER warm-up from the front, regroups what is left into `n_batches`
+    equal batches and builds a Student-t interval from their means.
+    """
+    __slots__ = ("rel_precision", "abs_precision", "level", "n_batches",
+                 "max_batches", "batch_size", "batches", "_sum", "_count",
+                 "observations")
+
+    def __init__(self, rel_precision: float, abs_precision: float = 0.0,
+                 level: float = 0.95, n_batches: int = 20, batch_size: int = 5,
+                 max_batches: int = 1024):
+        """
+        Args:
+            rel_precision (float): Target half-width relative to |mean|
+            abs_precision (float): Half-width that is always accepted, for
+                metrics whose mean may be 0 (e.g. a drop rate)
+            level (float): Confidence level
+            n_batches (int): Batches the interval is built from
+            batch_size (int): Initial observations per batch (5 for MSER-5)
+            max_batches (int): Stored batches before pairs are merged; even
+        """
+        if max_batches % 2 or max_batches < 4 * n_batches:
+            raise ValueError("max_batches must be even and at least 4 * n_batches")
+        self.rel_precision = rel_precision
+        self.abs_precision = abs_precision
+        self.level = level
+        self.n_batches = n_batches
+        self.max_batches = max_batches
+        self.batch_size = batch_size
+        self.batches = []
+        self._sum = 0.0
+        self._count = 0
+        self.observations = 0
+
+    def add(self, x: float) -> None:
+        self.observations += 1
+        self._sum += x
+        self._count += 1
+        if self._count == self.batch_size:
+            self.batches.append(self._sum / self._count)
+            self._sum = 0.0
+            self._count = 0
+            if len(self.batches) == self.max_batches:
+                b = self.batches
+                self.batches = [(b[i] + b[i + 1]) / 2 for i in range(0, len(b), 2)]
+                self.batch_size *= 2
+
+    def estimate(self):
+        """
+        Steady-state mean and confidence interval.
+
+        Returns:
+            tuple: (mean, half_width, warmup) with warmup the number of
+                truncated observations, or None while there are fewer than
+                2 * n_batches batches
+        """
+        if len(self.batches) < 2 * self.n_batches:
+            return None
+        y = np.asarray(self.batches)
+        d = mser_truncation(y)
+        y = y[d:]
+        # regroup into n_batches equal batches, dropping the oldest remainder
+        per = len(y) // self.n_batches
+        y = y[len(y) - per * self.n_batches:].reshape(self.n_batches, per).mean(axis=1)
+        mean = float(y.mean())
+        half_width = (t_quantile(0.5 + self.level / 2, self.n_batches - 1)
+                      * float(y.std(ddof=1)) / math.sqrt(self.n_batches))
+        return mean, half_width, d * self.batch_size
+
+    def converged(self) -> bool:
+        est = self.estimate()
+        if est is None:
+            return False
+        mean, half_width, _ = est
+        if half_width == 0 and mean == 0:
+            # every batch is 0 (e.g. no drop seen yet): the interval has no
+            # width because nothing happened, not because it is precise
+            return self.abs_precision > 0
+        return half_width <= max(self.rel_precision * abs(mean), self.abs_precision)
+
+
+class SequentialStopping:
+    """
+    Stopping rule for Engine.Run over several per-message metrics.
+
+    The engine feeds observations with observe() (a queue delay per
+    served message, a 0/1 drop indicator per arrival) and calls
+    should_stop() every `check_interval` events; the run stops once the
+    batch-means interval of every metric meets its precision.
+    """
+    def __init__(self, targets: dict, level: float = 0.95, check_interval: int = 1000,
+                 abs_precision: dict = None):
+        """
+        Args:
+            targets (dict): Metric name ("queue_delay", "drop_rate") ->
+                relative precision of its half-width
+            level (float): Confidence level
+            check_interval (int): Events between convergence checks
+            abs_precision (dict): Optional metric name -> absolute
+                half-width accepted regardless of the mean
+        """
+        abs_precision = abs_precision or {}
+        self.check_interval = check_interval
+        self.monitors = {name: BatchMeans(rel, abs_precision.get(name, 0.0), level)
+                         for name, rel in targets.items()}
+
+    def observe(self, name: str, x: float) -> None:
+        monitor = self.monitors.get(name)
+        if monitor is not None:
+            monitor.add(x)
+
+    def should_stop(self) -> bool:
+        return all(m.converged() for m in self.monitors.values())
+
+    def report(self) -> dict:
+        """
+        Returns:
+            dict: f"{name}_steady", f"{name}_halfwidth" and f"{name}_warmup"
+                for every monitored metric (NaN before an estimate exists)
+        """
+        result = {}
+        for name, monitor in self.monitors.items():
+            est = monitor.estimate() or (math.nan, math.nan, 0)
+            result[f"{name}_steady"], result[f"{name}_halfwidth"], result[f"{name}_warmup"] = est
+        return result
@@ -4,14 +4,24 @@ from Message import Message
 
 
 class Server:
-    def __init__(self):
+    def __init__(self, stream=None, mu: float = None):
         """
-        Initialize a new Server with a busy status and a random service rate mu.
+        Initialize a new Server with a busy status and a service rate mu.
 
-        The server starts as not busy (busy=False) and with a random mu value.
+        The server starts as not busy (busy=False) and, unless mu is given,
+        with a random mu value.
+
+        Args:
+            stream: Source of random variates (a RandomStreams.RandomStream);
+                defaults to the global `random` module
+            mu (float): Exponential service rate; random when None
         """
+        self.stream = stream if stream is not None else random
         self.busy = False
-        self.mu = random.randrange(1, 3)  # Initialize with a random value between 1--3
+        if mu is None:
+            self.mu = self.stream.randrange(1, 3)  # Initialize with a random value between 1--3
+        else:
+            self.mu = mu
 
     def setBusy(self, busy: bool) -> None:
         """
@@ -32,7 +42,13 @@ class Server:
         return self.busy
 
     def BeginService(self, msg: Message) -> Event:
-        eventTime = random.expovariate(self.mu).__round__(2)
+        # a message carrying its own work (common random numbers) takes
+        # work / mu, otherwise the duration is drawn from this server's stream
+        work = msg.work
+        if work is not None:
+            eventTime = (work / self.mu).__round__(2)
+        else:
+            eventTime = self.stream.expovariate(self.mu).__round__(2)
         newEvent = Event(message=msg, event_time=eventTime, event_type=EventType.MSG_DEPT.value)
 
         self.busy = True
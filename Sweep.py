@@ -0,0 +1,221 @@
+import argparse
+import hashlib
+import itertools
+import json
+import numbers
+import os
+from multiprocessing import Pool
+
+from Replications import (replication_seeds, run_replication,
+                          summarize_replications)
+from Analytics import engine_summary
+
+# Source files whose contents make up the code version in cache keys
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def expand_grid(grid: dict) -> list:
+    """
+    Cartesian product of a parameter grid.
+
+    Args:
+        grid (dict): Engine keyword argument -> list of values,
+            e.g. {"lam": [1, 2], "num_servers": [1, 2, 4]}
+
+    Returns:
+        list: One dict of Engine keyword arguments per grid point
+    """
+    names = list(grid)
+    return [dict(zip(names, values))
+            for values in itertools.product(*(grid[name] for name in names))]
+
+
+def code_version() -> str:
+    """Hash of the simulator sources, so cached results expire on code changes."""
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(CODE_DIR)):
+        if name.endswith(".py"):
+            digest.update(name.encode())
+            with open(os.path.join(CODE_DIR, name), "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _key_value(value):
+    """JSON form of the non-JSON numbers (e.g. NumPy scalars) in a cache key."""
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if isinstance(value, numbers.Real):
+        return float(value)
+    raise TypeError(type(value).__name__)
+
+
+def cache_key(config: dict, seed, replications: int, version: str) -> str:
+    """
+    Hash of everything a sweep cell's result depends on.
+
+    Raises:
+        ValueError: if a parameter is neither JSON nor a number, such as
+            a Topology or a profiler; sweep such configurations without
+            a cache
+    """
+    for name, value in config.items():
+        try:
+            json.dumps(value, default=_key_value)
+        except TypeError:
+            raise ValueError(f"parameter {name!r} of type {type(value).__name__} cannot be "
+                             f"part of a cache key; run the sweep with cache_dir=None") from None
+    blob = json.dumps({"config": config, "seed": seed,
+                       "replications": replications, "code": version},
+                      sort_keys=True, default=_key_value)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    On-disk cache of sweep cells, one JSON file per cell named by its key.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key: str):
+        """Cached report of a cell, or None."""
+        try:
+            with open(self.path(key)) as f:
+                return json.load(f)["report"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, key: str, config: dict, report: dict) -> None:
+        # write then rename, so an interrupted sweep never leaves a torn file
+        tmp = self.path(key) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"config": config, "report": report}, f, default=_key_value)
+        os.replace(tmp, self.path(key))
+
+
+def sweep(grid: dict, base: dict = None, replications: int = 10, seed: int = 0,
+          cache_dir: str = None, processes: int = None, level: float = 0.95,
+          analytic: bool = False) -> list:
+    """
+    Run every point of a parameter grid and aggregate its replications.
+
+    All replications of all uncached points go through one process pool,
+    so small grids with many replications and large grids with few both
+    keep every core busy.  Every point uses the same replication seeds.
+
+    Args:
+        grid (dict): Swept Engine keyword arguments, see expand_grid
+        base (dict): Engine keyword arguments shared by all points
+        replications (int): Replications per point, at least 1
+        seed (int): Root seed of the replications
+        cache_dir (str): Directory of the result cache; None disables it
+        processes (int): Pool size; defaults to os.cpu_count()
+        level (float): Confidence level of the reported intervals
+        analytic (bool): Answer every point from the M/M/c/K solution
+            (Analytics.engine_summary) instead of simulating it; the
+            half-widths are then 0
+
+    Returns:
+        list: (point, report) per grid point, in grid order, where report
+            maps metric name -> (mean, half_width)
+    """
+    points = expand_grid(grid)
+    base = base or {}
+    if analytic:
+        return [(point, {name: (value, 0.0) for name, value in
+                         engine_summary(**{**base, **point}).items()})
+                for point in points]
+    if replications < 1:
+        raise ValueError("a sweep needs at least one replication per point")
+    cache = ResultCache(cache_dir) if cache_dir is not None else None
+    version = code_version()
+    seeds = replication_seeds(seed, replications)
+
+    reports = [None] * len(points)
+    keys = [None] * len(points)
+    tasks = []
+    for p, point in enumerate(points):
+        if cache is not None:
+            keys[p] = cache_key({**base, **point}, seed, replications, version)
+            reports[p] = cache.get(keys[p])
+            if reports[p] is not None:
+                continue
+        params = {**base, **point}
+        tasks.extend(((p, r), s, params, None) for r, s in enumerate(seeds))
+
+    summaries = {}
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(tasks) <= 1:
+        results = map(run_replication, tasks)
+        pool = None
+    else:
+        pool = Pool(processes=min(processes, len(tasks)))
+        results = pool.imap_unordered(run_replication, tasks)
+    try:
+        for (p, _), summary in results:
+            summaries.setdefault(p, []).append(summary)
+            if len(summaries[p]) == replications:
+                report = summarize_replications(summaries.pop(p), level)
+                reports[p] = {name: list(ci) for name, ci in report.items()}
+                if cache is not None:
+                    cache.put(keys[p], {**base, **points[p]}, reports[p])
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return [(point, {name: tuple(ci) for name, ci in report.items()})
+            for point, report in zip(points, reports)]
+
+
+def print_table(results: list) -> None:
+    """Print sweep results as one table, a row per grid point."""
+    if not results:
+        return
+    params = list(results[0][0])
+    metrics = list(results[0][1])
+    header = ([f"{name:>12}" for name in params]
+              + [f"{name:>24}" for name in metrics])
+    print(" | ".join(header))
+    print("-+-".join("-" * len(h) for h in header))
+    for point, report in results:
+        cells = [f"{point[name]!s:>12}" for name in params]
+        cells += [f"{mean:>12.5g} ± {hw:<9.3g}" for mean, hw in
+                  (report[name] for name in metrics)]
+        print(" | ".join(cells))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Sweep Engine parameters over a grid and tabulate the results.")
+    parser.add_argument("--lam", type=float, nargs="+", default=[4.0])
+    parser.add_argument("--mu", type=float, nargs="+", default=[8.0])
+    parser.add_argument("--num-servers", type=int, nargs="+", default=[1])
+    parser.add_argument("--queue-size", type=int, nargs="+", default=[10])
+    parser.add_argument("--n-clients", type=int, default=3)
+    parser.add_argument("--simulation-time", type=float, default=10.0)
+    parser.add_argument("--replications", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--analytic", action="store_true",
+                        help="use the M/M/c/K solution instead of simulating")
+    parser.add_argument("--cache-dir", default=".sweep_cache",
+                        help="result cache directory ('' disables caching)")
+    args = parser.parse_args(argv)
+
+    grid = {"lam": args.lam, "mu": args.mu,
+            "num_servers": args.num_servers, "queue_size": args.queue_size}
+    base = {"n_clients": args.n_clients, "simulation_time": args.simulation_time}
+    results = sweep(grid, base, replications=args.replications, seed=args.seed,
+                    cache_dir=args.cache_dir or None, processes=args.processes,
+                    analytic=args.analytic)
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
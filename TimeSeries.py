@@ -0,0 +1,133 @@
+import numpy as np
+
+
+class StepSeries:
+    """
+    Time-weighted record of a piecewise-constant quantity, such as a
+    queue length, in a fixed number of buckets.
+
+    The quantity holds its value from one record() to the next.  Time is
+    cut into `capacity` buckets of equal width, each keeping the
+    time-weighted mean (as an area), the minimum and the maximum of the
+    value over the bucket.  When the buckets run out, adjacent pairs are
+    merged and the width doubles, so a run of any length fits in the
+    same memory and always covers the whole run, at a resolution that
+    coarsens as it grows.
+
+    Buckets are plain lists because record() runs on every gateway
+    event; to_arrays() exports them as NumPy arrays.
+    """
+    __slots__ = ("capacity", "width", "origin", "index", "bucket_end",
+                 "areas", "mins", "maxs", "last_time", "last_value",
+                 "total_area", "peak")
+
+    def __init__(self, capacity: int = 1024, width: float = 1.0, value: float = 0):
+        """
+        Args:
+            capacity (int): Number of buckets; must be even and positive
+            width (float): Initial bucket width in simulation time
+            value (float): Value before the first record()
+        """
+        if capacity <= 0 or capacity % 2:
+            raise ValueError("capacity must be a positive even number")
+        if width <= 0:
+            raise ValueError("width must be positive")
+        self.capacity = capacity
+        self.width = width
+        self.origin = None  # time of the first record()
+        self.index = 0
+        self.bucket_end = None
+        self.areas = [0.0] * capacity
+        self.mins = [None] * capacity
+        self.maxs = [None] * capacity
+        self.last_time = None
+        self.last_value = value
+        self.total_area = 0.0
+        self.peak = value
+
+    def record(self, time: float, value: float) -> None:
+        """The quantity changes to `value` at `time` (non-decreasing)."""
+        if self.origin is None:
+            self.origin = self.last_time = time
+            self.bucket_end = time + self.width
+        elif time > self.last_time:
+            self._advance(time)
+        self.last_value = value
+        if value > self.peak:
+            self.peak = value
+
+    def _advance(self, time: float) -> None:
+        """Account for the current value holding from last_time to time."""
+        v = self.last_value
+        self.total_area += v * (time - self.last_time)
+        while time >= self.bucket_end:
+            self._hold(self.bucket_end, v)
+            self.index += 1
+            if self.index == self.capacity:
+                self._compact()
+            self.bucket_end += self.width
+        self._hold(time, v)
+
+    def _hold(self, time: float, v: float) -> None:
+        """Add value v held from last_time to time to the current bucket."""
+        if time <= self.last_time:
+            return
+        i = self.index
+        self.areas[i] += v * (time - self.last_time)
+        if self.mins[i] is None or v < self.mins[i]:
+            self.mins[i] = v
+        if self.maxs[i] is None or v > self.maxs[i]:
+            self.maxs[i] = v
+        self.last_time = time
+
+    def _compact(self) -> None:
+        """Merge adjacent bucket pairs, doubling the bucket width."""
+        half = self.capacity // 2
+        areas, mins, maxs = self.areas, self.mins, self.maxs
+        for i in range(half):
+            a, b = 2 * i, 2 * i + 1
+            areas[i] = areas[a] + areas[b]
+            lo = [m for m in (mins[a], mins[b]) if m is not None]
+            hi = [m for m in (maxs[a], maxs[b]) if m is not None]
+            mins[i] = min(lo) if lo else None
+            maxs[i] = max(hi) if hi else None
+        for i in range(half, self.capacity):
+            areas[i] = 0.0
+            mins[i] = maxs[i] = None
+        self.index = half
+        self.width *= 2
+
+    def advance(self, time: float) -> None:
+        """Extend the current value up to `time`, e.g. the end of the run."""
+        if self.origin is not None and time > self.last_time:
+            self._advance(time)
+
+    def mean(self) -> float:
+        """Time-weighted mean over the whole recorded span."""
+        if self.origin is None or self.last_time == self.origin:
+            return float(self.last_value)
+        return self.total_area / (self.last_time - self.origin)
+
+    def to_arrays(self) -> dict:
+        """
+        The buckets as NumPy arrays.
+
+        Returns:
+            dict: "time" (bucket start, relative to the first record),
+                "mean", "min" and "max" per bucket, up to last_time
+        """
+        if self.origin is None:
+            empty = np.empty(0)
+            return {"time": empty, "mean": empty, "min": empty, "max": empty}
+        # the current bucket counts only if some time has passed in it
+        bucket_start = self.bucket_end - self.width
+        n = self.index + (1 if self.last_time > bucket_start else 0)
+        durations = np.full(n, self.width)
+        if n > self.index:
+            durations[-1] = self.last_time - bucket_start
+        return {
+            "time": np.arange(n) * self.width,
+            "mean": np.asarray(self.areas[:n]) / durations,
+            "min": np.array(self.mins[:n], dtype=float),
+            "max": np.array(self.maxs[:n], dtype=float),
+        }
@@ -0,0 +1,200 @@
+import heapq
+import math
+import random
+
+
+class Link:
+    """
+    Directed link between two nodes of a Topology.
+
+    A message entering the link waits until the link has finished
+    transmitting the messages ahead of it, takes 1 / capacity to transmit
+    and then `delay` to propagate.  Without a capacity the link only
+    delays messages.
+    """
+    __slots__ = ("source", "target", "delay", "capacity", "free_at", "messages")
+
+    def __init__(self, source: int, target: int, delay: float, capacity: float = None):
+        """
+        Args:
+            source (int): Index of the node the link leaves
+            target (int): Index of the node it enters
+            delay (float): Propagation delay in seconds
+            capacity (float): Messages per second; None for unlimited
+        """
+        if delay < 0:
+            raise ValueError("link delay must be non-negative")
+        if capacity is not None and capacity <= 0:
+            raise ValueError("link capacity must be positive")
+        self.source = source
+        self.target = target
+        self.delay = delay
+        self.capacity = capacity
+        self.free_at = -math.inf  # when the link finishes its current transmissions
+        self.messages = 0
+
+    def cost(self) -> float:
+        """Routing weight: latency of a message over the idle link."""
+        return self.delay if self.capacity is None else self.delay + 1.0 / self.capacity
+
+    def transmit(self, now: float) -> float:
+        """Send a message into the link at `now`; returns its arrival time at target."""
+        self.messages += 1
+        if self.capacity is None:
+            return now + self.delay
+        start = self.free_at if self.free_at > now else now
+        self.free_at = start + 1.0 / self.capacity
+        return self.free_at + self.delay
+
+
+class Topology:
+    """
+    Graph of gateway nodes connected by Links, with shortest-path routing.
+
+    Node labels are the gateway ids an Engine run uses (Message
+    destinations), so they should be integers written as strings when
+    traces are recorded.  compute_routes() builds, for every pair of
+    nodes, the first Link of a minimum-latency path, after which the next
+    hop of a message is two list lookups.
+
+    Topology files have one link per line, `source target delay
+    [capacity]`, with `#` starting a comment; a line with a single label
+    declares an isolated node.
+    """
+    def __init__(self):
+        self.nodes = []   # labels, by node index
+        self.index = {}   # label -> node index
+        self.links = []   # per node index: {target index: Link}
+        # routes[u][d]: first Link on the path from node u to node d; None
+        # when u == d or d is unreachable.  Built by compute_routes
+        self.routes = None
+
+    def add_node(self, label) -> int:
+        """Index of the node `label`, adding it if it is new."""
+        label = str(label)
+        index = self.index.get(label)
+        if index is None:
+            index = len(self.nodes)
+            self.nodes.append(label)
+            self.index[label] = index
+            self.links.append({})
+            self.routes = None
+        return index
+
+    def add_link(self, source, target, delay: float, capacity: float = None,
+                 directed: bool = False) -> None:
+        """Connect two nodes (both directions unless directed), replacing an existing link."""
+        u = self.add_node(source)
+        v = self.add_node(target)
+        if u == v:
+            raise ValueError(f"self-loop at node {source!r}")
+        self.links[u][v] = Link(u, v, delay, capacity)
+        if not directed:
+            self.links[v][u] = Link(v, u, delay, capacity)
+        self.routes = None
+
+    @classmethod
+    def load(cls, path: str, directed: bool = False) -> "Topology":
+        """Read a topology file (see the class docstring)."""
+        topology = cls()
+        with open(path) as f:
+            for number, line in enumerate(f, 1):
+                fields = line.split("#", 1)[0].split()
+                if not fields:
+                    continue
+                if len(fields) == 1:
+                    topology.add_node(fields[0])
+                elif len(fields) in (3, 4):
+                    capacity = float(fields[3]) if len(fields) == 4 else None
+                    topology.add_link(fields[0], fields[1], float(fields[2]), capacity, directed)
+                else:
+                    raise ValueError(f"{path}:{number}: expected 'source target delay [capacity]'")
+        return topology
+
+    def save(self, path: str) -> None:
+        """
+        Write the topology in the format load() reads: every node first,
+        so node indices survive a round trip, then every link as directed.
+        """
+        with open(path, "w") as f:
+            for label in self.nodes:
+                f.write(f"{label}\n")
+            for u, label in enumerate(self.nodes):
+                for link in self.links[u].values():
+                    capacity = "" if link.capacity is None else f" {link.capacity!r}"
+                    f.write(f"{label} {self.nodes[link.target]} {link.delay!r}{capacity}\n")
+
+    @classmethod
+    def random_mesh(cls, n: int, degree: int = 4, delay: tuple = (0.001, 0.01),
+                    capacity: float = None, seed=None) -> "Topology":
+        """
+        Connected random mesh of nodes "1".."n": a ring plus random chords
+        up to about `degree` links per node, with delays uniform in `delay`.
+        """
+        rng = random.Random(seed)
+        topology = cls()
+        for i in range(n):
+            topology.add_node(i + 1)
+        if n < 2:
+            return topology
+        for i in range(n):
+            topology.add_link(i + 1, (i + 1) % n + 1, rng.uniform(*delay), capacity)
+        for _ in range(n * max(degree - 2, 0) // 2):
+            u, v = rng.sample(range(1, n + 1), 2)
+            topology.add_link(u, v, rng.uniform(*delay), capacity)
+        return topology
+
+    def compute_routes(self) -> None:
+        """
+        Fill self.routes with one Dijkstra search per destination.
+
+        Each search runs over the reversed links from the destination, so
+        the Link that relaxes node u is u's first hop towards it.  Ties
+        are broken by node index, so routes are deterministic.
+        """
+        n = len(self.nodes)
+        incoming = [[] for _ in range(n)]
+        for out in self.links:
+            for link in out.values():
+                incoming[link.target].append((link.source, link.cost(), link))
+        routes = [[None] * n for _ in range(n)]
+        inf = math.inf
+        heappush, heappop = heapq.heappush, heapq.heappop
+        for d in range(n):
+            dist = [inf] * n
+            dist[d] = 0.0
+            heap = [(0.0, d)]
+            while heap:
+                dv, v = heappop(heap)
+                if dv > dist[v]:
+                    continue
+                for u, cost, link in incoming[v]:
+                    du = dv + cost
+                    if du < dist[u]:
+                        dist[u] = du
+                        routes[u][d] = link
+                        heappush(heap, (du, u))
+        self.routes = routes
+
+    def next_link(self, node: int, destination: int):
+        """First Link from node towards destination (indices), or None."""
+        return self.routes[node][destination]
+
+    def ingress(self, source: str) -> int:
+        """Node a client attaches to: client k (source "k") is at node (k - 1) mod n."""
+        return (int(source) - 1) % len(self.nodes)
+
+    def path(self, source, destination) -> list:
+        """Labels of the nodes on the route between two labels; [] if unreachable."""
+        if self.routes is None:
+            self.compute_routes()
+        u, d = self.index[str(source)], self.index[str(destination)]
+        nodes = [self.nodes[u]]
+        while u != d:
+            link = self.routes[u][d]
+            if link is None:
+                return []
+            u = link.target
+            nodes.append(self.nodes[u])
+        return nodes
+
@@ -1,6 +1,18 @@
 import time
+from Event import EventType
+
+# Fixed-width trace record shared by the columnar TraceStore and the
+# on-disk trace formats: (time, node, type code, destination, msg id).
+# Node and destination are the numeric node ids used by the Engine.
+RECORD_FIELDS = ("time", "node", "type", "destination", "msg_id")
+RECORD_FORMAT = "<diBiq"  # float64, int32, uint8, int32, int64; 25 bytes
+
+EVENT_TYPE_CODES = {t.name: t.value for t in EventType}
+EVENT_TYPE_NAMES = {code: name for name, code in EVENT_TYPE_CODES.items()}
+
 
 class Trace:
+    __slots__ = ("trace_id", "event_id", "message", "event_time", "event_type")
     _id_counter = 0
 
     def __init__(self, event_id, message, event_time=None, event_type=None):
@@ -17,31 +29,49 @@ class Trace:
         self.event_time = event_time if event_time is not None else time.time()
         self.event_type = event_type
 
+    def as_record(self) -> tuple:
+        """Return this trace as a fixed-width record (see RECORD_FIELDS)."""
+        return (self.event_time,
+                int(self.message.get_source()),
+                self.event_type,
+                int(self.message.get_destination()),
+                self.message.get_message_id())
+
     def print_trace(self):
         """
         Print an ASCII table with columns:
           Time (s)  | Node | Type     | Destination | MsgID
         Node is the message source; MsgID is the unique ID of the message.
         """
-        headers = ["Time (s)", "Node", "Type", "Destination", "MsgID"]
-
-        # format relative time to two decimals
-        time_str = f"{self.event_time:.2f}"
-        node_str = self.message.get_source()
-        type_str = self.event_type or ""
-        dst_str = self.message.get_destination()
-        msgid_str = str(self.message.get_message_id())
-
-        vals = [time_str, node_str, type_str, dst_str, msgid_str]
-
-        # compute column widths
-        col_w = [max(len(h), len(v)) for h, v in zip(headers, vals)]
-        border = "+" + "+".join("-" * (w + 2) for w in col_w) + "+"
-        header_row = "|" + "|".join(f" {h.ljust(w)} " for h, w in zip(headers, col_w)) + "|"
-        value_row = "|" + "|".join(f" {v.ljust(w)} " for v, w in zip(vals, col_w)) + "|"
-
-        print(border)
-        print(header_row)
-        print(border)
-        print(value_row)
-        print(border)
\ No newline at end of file
+        print_table(self.event_time,
+                    self.message.get_source(),
+                    EVENT_TYPE_NAMES.get(self.event_type, ""),
+                    self.message.get_destination(),
+                    self.message.get_message_id())
+
+
+def print_record(record: tuple) -> None:
+    """Print a fixed-width trace record as the same ASCII table as print_trace."""
+    event_time, node, type_code, destination, msg_id = record
+    print_table(event_time, str(node), EVENT_TYPE_NAMES.get(type_code, str(type_code)),
+                str(destination), msg_id)
+
+
+def print_table(event_time: float, node: str, event_type: str,
+                destination: str, msg_id: int) -> None:
+    headers = ["Time (s)", "Node", "Type", "Destination", "MsgID"]
+
+    # format relative time to two decimals
+    vals = [f"{event_time:.2f}", node, event_type, destination, str(msg_id)]
+
+    # compute column widths
+    col_w = [max(len(h), len(v)) for h, v in zip(headers, vals)]
+    border = "+" + "+".join("-" * (w + 2) for w in col_w) + "+"
+    header_row = "|" + "|".join(f" {h.ljust(w)} " for h, w in zip(headers, col_w)) + "|"
+    value_row = "|" + "|".join(f" {v.ljust(w)} " for v, w in zip(vals, col_w)) + "|"
+
+    print(border)
+    print(header_row)
+    print(border)
+    print(value_row)
+    print(border)
@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+
+from Trace import EVENT_TYPE_CODES
+from TraceSink import BINARY_HEADER, BINARY_MAGIC, BINARY_VERSION, BINARY_RECORD
+from TraceStore import TRACE_DTYPE
+
+
+class TraceReader:
+    """
+    Memory-mapped reader for binary trace files written by BinaryTraceSink.
+
+    The records are mapped, not loaded: pages are read from disk only
+    as chunks are touched, so iterating a multi-GB trace keeps resident
+    memory bounded by the OS page cache rather than the file size.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(BINARY_HEADER.size)
+        if len(header) < BINARY_HEADER.size:
+            raise ValueError(f"{path}: too short to be a binary trace file")
+        magic, version, record_size = BINARY_HEADER.unpack(header)
+        if magic != BINARY_MAGIC:
+            raise ValueError(f"{path}: not a binary trace file")
+        if version != BINARY_VERSION or record_size != BINARY_RECORD.size:
+            raise ValueError(f"{path}: unsupported trace version {version} "
+                             f"(record size {record_size})")
+
+        count = (os.path.getsize(path) - BINARY_HEADER.size) // record_size
+        if count == 0:
+            self.records = np.empty(0, dtype=TRACE_DTYPE)
+        else:
+            self.records = np.memmap(path, dtype=TRACE_DTYPE, mode="r",
+                                     offset=BINARY_HEADER.size, shape=(count,))
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def chunks(self, chunk_size: int = 1 << 16):
+        """Yield consecutive array views of at most `chunk_size` records."""
+        for start in range(0, len(self.records), chunk_size):
+            yield self.records[start:start + chunk_size]
+
+    def __iter__(self):
+        """Yield every record as a (time, node, type, destination, msg_id) tuple."""
+        for chunk in self.chunks():
+            yield from chunk.tolist()
+
+    def arrivals(self, chunk_size: int = 1 << 16):
+        """
+        Yield SEND_MSG records as (time, node, destination, msg_id) tuples.
+
+        Records are yielded in file order, which is non-decreasing in time
+        for traces produced by Engine.
+        """
+        send = EVENT_TYPE_CODES["SEND_MSG"]
+        for chunk in self.chunks(chunk_size):
+            sends = chunk[chunk["type"] == send]
+            yield from zip(sends["time"].tolist(), sends["node"].tolist(),
+                           sends["destination"].tolist(), sends["msg_id"].tolist())
+
+    def close(self) -> None:
+        """
+        Drop this reader's reference to the mapping.  The file is unmapped
+        once no chunk views handed out by chunks() are alive.
+        """
+        self.records = np.empty(0, dtype=TRACE_DTYPE)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,182 @@
+import json
+import struct
+import threading
+
+from Trace import RECORD_FIELDS, RECORD_FORMAT, EVENT_TYPE_NAMES, print_record
+
+# Binary trace file: a 12-byte header followed by packed RECORD_FORMAT records.
+BINARY_MAGIC = b"SIMTRACE"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<8sHH")  # magic, version, record size
+BINARY_RECORD = struct.Struct(RECORD_FORMAT)
+
+
+class TraceSink:
+    """
+    Destination for trace records produced by Engine.GenerateTrace.
+
+    A record is a tuple laid out as Trace.RECORD_FIELDS:
+    (time, node, type code, destination, msg id).
+
+    Methods:
+    +------------+------------------------------------------------------------+
+    | write      | Accept one record                                          |
+    | flush      | Push buffered records to the underlying output             |
+    | close      | Flush and release the output                               |
+    +------------+------------------------------------------------------------+
+    """
+    def write(self, record: tuple) -> None:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class AsciiTableSink(TraceSink):
+    """Human-readable sink: prints each record as an ASCII table on stdout."""
+    def write(self, record: tuple) -> None:
+        print_record(record)
+
+
+class FileTraceSink(TraceSink):
+    """
+    Base class for file sinks with double-buffered writes.
+
+    Records are collected in a front buffer.  When it holds
+    `buffer_records` records it is swapped with the back buffer, which
+    is encoded and written either inline or, with `threaded=True`, by a
+    writer thread while the simulation keeps filling the new front
+    buffer.  The simulation only waits if the writer is still busy with
+    the previous buffer when the next one fills up.
+
+    Subclasses implement encode() and optionally header().
+    """
+    def __init__(self, path: str, buffer_records: int = 8192, threaded: bool = False):
+        if buffer_records <= 0:
+            raise ValueError("buffer_records must be positive")
+        self.path = path
+        self.buffer_records = buffer_records
+        self._file = open(path, "wb")
+        self._file.write(self.header())
+
+        self._front = []
+        self._back = None          # buffer handed to the writer, None when idle
+        self._closing = False
+        self._error = None
+        self._cond = threading.Condition()
+        self._thread = None
+        if threaded:
+            self._thread = threading.Thread(target=self._writer, name=f"trace-writer:{path}",
+                                            daemon=True)
+            self._thread.start()
+
+    def header(self) -> bytes:
+        return b""
+
+    def encode(self, records: list) -> bytes:
+        raise NotImplementedError
+
+    def write(self, record: tuple) -> None:
+        self._front.append(record)
+        if len(self._front) >= self.buffer_records:
+            self._swap()
+
+    def _swap(self) -> None:
+        """Hand the full front buffer to the writer and start a new one."""
+        full, self._front = self._front, []
+        if self._thread is None:
+            self._file.write(self.encode(full))
+            return
+        with self._cond:
+            while self._back is not None:
+                self._cond.wait()
+            self._raise_writer_error()
+            self._back = full
+            self._cond.notify_all()
+
+    def _writer(self) -> None:
+        while True:
+            with self._cond:
+                while self._back is None and not self._closing:
+                    self._cond.wait()
+                if self._back is None:
+                    return
+                buffer = self._back
+            try:
+                self._file.write(self.encode(buffer))
+            except BaseException as exc:  # reported to the simulation thread
+                self._error = exc
+            with self._cond:
+                self._back = None
+                self._cond.notify_all()
+
+    def _raise_writer_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def flush(self) -> None:
+        if self._front:
+            self._swap()
+        if self._thread is not None:
+            with self._cond:
+                while self._back is not None:
+                    self._cond.wait()
+            self._raise_writer_error()
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        try:
+            self.flush()
+        finally:
+            if self._thread is not None:
+                with self._cond:
+                    self._closing = True
+                    self._cond.notify_all()
+                self._thread.join()
+            self._file.close()
+
+
+class BinaryTraceSink(FileTraceSink):
+    """Compact binary format: BINARY_HEADER, then 25-byte packed records."""
+    def header(self) -> bytes:
+        return BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, BINARY_RECORD.size)
+
+    def encode(self, records: list) -> bytes:
+        pack = BINARY_RECORD.pack
+        return b"".join([pack(*record) for record in records])
+
+
+class CsvTraceSink(FileTraceSink):
+    """CSV with a header row; the type column holds the event type name."""
+    def header(self) -> bytes:
+        return (",".join(RECORD_FIELDS) + "\n").encode()
+
+    def encode(self, records: list) -> bytes:
+        names = EVENT_TYPE_NAMES
+        return "".join([f"{t!r},{node},{names[code]},{dst},{msg_id}\n"
+                        for t, node, code, dst, msg_id in records]).encode()
+
+
+class JsonLinesTraceSink(FileTraceSink):
+    """One JSON object per line, keyed by RECORD_FIELDS."""
+    def encode(self, records: list) -> bytes:
+        names = EVENT_TYPE_NAMES
+        lines = []
+        for t, node, code, dst, msg_id in records:
+            lines.append(json.dumps({"time": t, "node": node, "type": names[code],
+                                     "destination": dst, "msg_id": msg_id}))
+            lines.append("\n")
+        return "".join(lines).encode()
+
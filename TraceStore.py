@@ -0,0 +1,132 @@
+import numpy as np
+
+from Trace import RECORD_FIELDS, EVENT_TYPE_CODES
+
+# Packed (unaligned) structured dtype matching Trace.RECORD_FORMAT
+TRACE_DTYPE = np.dtype([
+    ("time", "<f8"),
+    ("node", "<i4"),
+    ("type", "u1"),
+    ("destination", "<i4"),
+    ("msg_id", "<i8"),
+])
+assert TRACE_DTYPE.names == RECORD_FIELDS
+
+
+class TraceStore:
+    """
+    Columnar trace store backed by NumPy structured arrays.
+
+    Records are written into preallocated chunks of `chunk_size` rows, so
+    appends never copy earlier data.  view() consolidates the chunks into
+    one contiguous array (once; later calls reuse it until new records
+    arrive) and column access returns NumPy views, so post-run analysis
+    is vectorized instead of a loop over Python objects.
+
+    Methods:
+    +------------------+------------------------------------------------------+
+    | append           | Add one record (time, node, type, destination, id)   |
+    | extend           | Add an array of TRACE_DTYPE records                  |
+    | view             | All records as one structured array                  |
+    | chunks           | Iterate records chunk by chunk without consolidating |
+    | column / []      | One column (e.g. "time") as an array view            |
+    | select           | Records of one event type                            |
+    | delays           | Per-message delay between two event types            |
+    | delay_histogram  | np.histogram of delays()                             |
+    +------------------+------------------------------------------------------+
+    """
+    def __init__(self, chunk_size: int = 1 << 16):
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        self.chunk_size = chunk_size
+        self._frozen = np.empty(0, dtype=TRACE_DTYPE)   # consolidated prefix
+        self._chunks = []                                # full chunks after it
+        self._current = np.empty(chunk_size, dtype=TRACE_DTYPE)
+        self._fill = 0
+
+    def __len__(self) -> int:
+        return len(self._frozen) + len(self._chunks) * self.chunk_size + self._fill
+
+    def append(self, time: float, node: int, type_code: int,
+               destination: int, msg_id: int) -> None:
+        if self._fill == self.chunk_size:
+            self._chunks.append(self._current)
+            self._current = np.empty(self.chunk_size, dtype=TRACE_DTYPE)
+            self._fill = 0
+        self._current[self._fill] = (time, node, type_code, destination, msg_id)
+        self._fill += 1
+
+    def extend(self, records: np.ndarray) -> None:
+        """Append an array of TRACE_DTYPE records."""
+        records = np.asarray(records, dtype=TRACE_DTYPE)
+        while len(records):
+            if self._fill == self.chunk_size:
+                self._chunks.append(self._current)
+                self._current = np.empty(self.chunk_size, dtype=TRACE_DTYPE)
+                self._fill = 0
+            n = min(len(records), self.chunk_size - self._fill)
+            self._current[self._fill:self._fill + n] = records[:n]
+            self._fill += n
+            records = records[n:]
+
+    def chunks(self):
+        """Yield the stored records as a sequence of array views, oldest first."""
+        if len(self._frozen):
+            yield self._frozen
+        yield from self._chunks
+        if self._fill:
+            yield self._current[:self._fill]
+
+    def view(self) -> np.ndarray:
+        """
+        Return all records as one contiguous, read-only structured array.
+
+        Returns:
+            np.ndarray: Array of TRACE_DTYPE with len(self) rows
+        """
+        if self._chunks or self._fill:
+            self._frozen = np.concatenate(list(self.chunks()))
+            self._frozen.flags.writeable = False
+            self._chunks = []
+            self._fill = 0
+        return self._frozen
+
+    def column(self, name: str) -> np.ndarray:
+        return self.view()[name]
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.column(name)
+
+    def select(self, event_type: str) -> np.ndarray:
+        """Return the records whose type is `event_type` (e.g. "SEND_MSG")."""
+        records = self.view()
+        return records[records["type"] == EVENT_TYPE_CODES[event_type]]
+
+    def delays(self, start: str = "SEND_MSG", end: str = "RECV_MSG") -> np.ndarray:
+        """
+        Per-message time from its `start` record to its `end` record.
+
+        Messages are matched on msg_id with a sort and a binary search, so
+        the cost is O(n log n) in NumPy rather than a Python dict lookup
+        per record.  Messages missing either record are skipped, e.g.
+        dropped messages, which have no MSG_DEPT.  An Engine records only
+        SEND_MSG unless its trace_events include the other types.
+
+        Returns:
+            np.ndarray: float64 delays, in the order of the `end` records
+        """
+        first = self.select(start)
+        last = self.select(end)
+        if len(first) == 0 or len(last) == 0:
+            return np.empty(0, dtype=np.float64)
+        order = np.argsort(first["msg_id"], kind="stable")
+        ids = first["msg_id"][order]
+        pos = np.searchsorted(ids, last["msg_id"])
+        pos[pos == len(ids)] = 0
+        matched = ids[pos] == last["msg_id"]
+        return last["time"][matched] - first["time"][order[pos[matched]]]
+
+    def delay_histogram(self, start: str = "SEND_MSG", end: str = "RECV_MSG",
+                        bins=50, range=None):
+        """np.histogram of delays(start, end); returns (counts, bin_edges)."""
+        return np.histogram(self.delays(start, end), bins=bins, range=range)
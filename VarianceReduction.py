@@ -0,0 +1,168 @@
+import math
+import numbers
+
+import numpy as np
+
+from OnlineStats import t_quantile
+from Replications import replicate, confidence_interval
+
+
+def expected_offered_load(n_clients: int = 3, num_sources: int = 2, lam=4.0, mu: float = 8.0,
+                          num_servers: int = 1, topology=None, **_) -> float:
+    """
+    Expectation of Summary()["offered_load"] for Engine keyword arguments:
+    the total client rate over the total service capacity.
+    """
+    if not mu:
+        raise ValueError("the offered load needs a fixed service rate mu")
+    total_rate = float(lam) * n_clients if isinstance(lam, numbers.Real) else math.fsum(lam[:n_clients])
+    gateways = len(topology.nodes) if topology is not None else num_sources
+    return total_rate / (mu * num_servers * gateways)
+
+
+def replication_metrics(n: int, params: dict, metrics, seed=None, processes: int = None) -> dict:
+    """
+    Run n replications and collect metrics in replication-index order.
+
+    Index order matters here: replication i of two configurations started
+    from the same seed uses the same random streams.
+
+    Returns:
+        dict: metric name -> np.ndarray of n values
+    """
+    rows = sorted(replicate(n, params, seed=seed, processes=processes), key=lambda r: r[0])
+    return {name: np.array([summary[name] for _, summary in rows], dtype=float)
+            for name in metrics}
+
+
+def paired_difference(params_a: dict, params_b: dict, n: int, metric: str, seed=None,
+                      level: float = 0.95, processes: int = None, common: bool = True) -> tuple:
+    """
+    Confidence interval for E[metric under b] - E[metric under a].
+
+    With common=True both configurations run with common_random_numbers
+    from the same replication seeds, so replication i of a and of b see
+    the same arrivals and the same service requirements, and the interval
+    is built from the n paired differences.  With common=False the two
+    configurations use independent seeds and the interval combines two
+    independent sample variances, which is what CRN is measured against.
+
+    Returns:
+        tuple: (mean difference, half_width)
+    """
+    if common:
+        params_a = dict(params_a, common_random_numbers=True)
+        params_b = dict(params_b, common_random_numbers=True)
+        seed_b = seed
+    else:
+        seed_b = None if seed is None else [seed, 1]
+    a = replication_metrics(n, params_a, [metric], seed, processes)[metric]
+    b = replication_metrics(n, params_b, [metric], seed_b, processes)[metric]
+    if common:
+        return confidence_interval(b - a, level)
+    if n < 2:
+        return float(b.mean() - a.mean()), math.inf
+    std_err = math.sqrt((a.var(ddof=1) + b.var(ddof=1)) / n)
+    return float(b.mean() - a.mean()), t_quantile(0.5 + level / 2, 2 * n - 2) * std_err
+
+
+def antithetic_estimate(params: dict, n_pairs: int, metric: str, seed=None,
+                        level: float = 0.95, processes: int = None) -> tuple:
+    """
+    Estimate E[metric] from n_pairs antithetic pairs of runs.
+
+    The two runs of pair i share replication seed i; one generates every
+    variate from U and the other from 1 - U (RandomStreams.VARIATES), so
+    their outputs are negatively correlated and the pair mean varies less
+    than the mean of two independent runs.
+
+    Returns:
+        tuple: (mean, half_width, correlation within the pairs)
+    """
+    plain = replication_metrics(n_pairs, dict(params, variates="inversion"), [metric],
+                                seed, processes)[metric]
+    twin = replication_metrics(n_pairs, dict(params, variates="antithetic"), [metric],
+                               seed, processes)[metric]
+    mean, half_width = confidence_interval((plain + twin) / 2, level)
+    correlation = float(np.corrcoef(plain, twin)[0, 1]) if n_pairs > 1 else math.nan
+    return mean, half_width, correlation
+
+
+def control_variate(samples, controls, expected: float, level: float = 0.95) -> tuple:
+    """
+    Control-variate estimate of the mean of `samples`.
+
+    Each sample y_i is adjusted by a control c_i with known expectation:
+    y_i - beta (c_i - expected), with beta the least-squares slope of y
+    on c.  The interval is the regression one, with n - 2 degrees of
+    freedom for the estimated beta.
+
+    Returns:
+        tuple: (mean, half_width, beta); half_width is inf with fewer
+            than three samples
+    """
+    y = np.asarray(samples, dtype=float)
+    c = np.asarray(controls, dtype=float)
+    n = len(y)
+    if n < 3:
+        return float(y.mean()), math.inf, 0.0
+    dc = c - c.mean()
+    sxx = float(dc @ dc)
+    beta = float(dc @ (y - y.mean())) / sxx if sxx > 0 else 0.0
+    mean = float(y.mean() - beta * (c.mean() - expected))
+    residuals = y - y.mean() - beta * dc
+    s2 = float(residuals @ residuals) / (n - 2)
+    variance = s2 * (1.0 / n + ((c.mean() - expected) ** 2 / sxx if sxx > 0 else 0.0))
+    return mean, t_quantile(0.5 + level / 2, n - 2) * math.sqrt(variance), beta
+
+
+def control_variate_estimate(params: dict, n: int, metric: str, seed=None,
+                             level: float = 0.95, processes: int = None) -> tuple:
+    """
+    Estimate E[metric] from n replications with the offered load as control.
+
+    The runs use common_random_numbers so that Summary() reports the
+    offered load they actually generated; its expectation is known from
+    the parameters (expected_offered_load).
+
+    Returns:
+        tuple: (mean, half_width, beta)
+    """
+    params = dict(params, common_random_numbers=True)
+    values = replication_metrics(n, params, [metric, "offered_load"], seed, processes)
+    return control_variate(values[metric], values["offered_load"],
+                           expected_offered_load(**params), level)
+
+
+def required_replications(half_width: float, n: int, target: float) -> int:
+    """Replications needed for `target` half-width, given `half_width` from n."""
+    return math.ceil(n * (half_width / target) ** 2)
+
+
+def main() -> None:
+    base = {"n_clients": 10, "num_sources": 2, "simulation_time": 500.0, "lam": 0.5,
+            "mu": 1.0, "queue_size": 10}
+    a = dict(base, num_servers=2)
+    b = dict(base, num_servers=3)
+    n = 20
+    metric = "queue_delay"
+
+    print(f"{metric}: 3 vs 2 servers per gateway, {n} replications each")
+    independent = paired_difference(a, b, n, metric, seed=1, common=False)
+    common = paired_difference(a, b, n, metric, seed=1, common=True)
+    for name, (mean, half_width) in (("independent", independent), ("common", common)):
+        print(f"{name:>12}: {mean:+.5f} ± {half_width:.5f}")
+    print(f"CRN needs {independent[1] ** 2 / common[1] ** 2:.1f}x fewer runs for the same interval")
+    print()
+
+    plain = confidence_interval(replication_metrics(2 * n, a, [metric], seed=2)[metric])
+    mean, half_width, correlation = antithetic_estimate(a, n, metric, seed=2)
+    print(f"{metric} with 2 servers from {2 * n} runs")
+    print(f"{'independent':>12}: {plain[0]:.5f} ± {plain[1]:.5f}")
+    print(f"{'antithetic':>12}: {mean:.5f} ± {half_width:.5f} (pair correlation {correlation:+.2f})")
+    mean, half_width, beta = control_variate_estimate(a, 2 * n, metric, seed=2)
+    print(f"{'control':>12}: {mean:.5f} ± {half_width:.5f} (beta {beta:.4f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import math
+
+import numpy as np
+import pytest
+
+from Analytics import mmck, compare, engine_summary
+from Engine import Engine
+from Replications import replicate, summarize_replications
+
+
+def erlang_b(load: float, servers: int) -> float:
+    """Erlang-B blocking by the standard recursion B(n) = a B(n-1) / (n + a B(n-1))."""
+    b = 1.0
+    for n in range(1, servers + 1):
+        b = load * b / (n + load * b)
+    return b
+
+
+@pytest.mark.parametrize("rho, capacity", [(0.5, 1), (0.5, 10), (0.9, 5), (1.5, 4)])
+def test_mm1k(rho, capacity):
+    result = mmck(rho, 1.0, 1, capacity - 1)
+    blocking = (1 - rho) * rho ** capacity / (1 - rho ** (capacity + 1))
+    system = (rho / (1 - rho)
+              - (capacity + 1) * rho ** (capacity + 1) / (1 - rho ** (capacity + 1)))
+    assert result["blocking"] == pytest.approx(blocking, rel=1e-12)
+    assert result["system_length"] == pytest.approx(system, rel=1e-12)
+    assert result["throughput"] == pytest.approx(rho * (1 - blocking), rel=1e-12)
+
+
+def test_mm1k_at_unit_load():
+    # every state is equally likely at rho = 1
+    result = mmck(2.0, 2.0, 1, 4)
+    assert result["blocking"] == pytest.approx(1 / 6, rel=1e-12)
+    assert result["system_length"] == pytest.approx(2.5, rel=1e-12)
+
+
+@pytest.mark.parametrize("load, servers, expected", [(1.0, 1, 0.5), (2.0, 2, 0.4),
+                                                     (10.0, 10, 0.2145823)])
+def test_erlang_b(load, servers, expected):
+    blocking = mmck(load, 1.0, servers, 0)["blocking"]
+    assert blocking == pytest.approx(expected, abs=1e-7)
+    assert blocking == pytest.approx(erlang_b(load, servers), rel=1e-12)
+    assert mmck(load, 1.0, servers, 0)["queue_length"] == 0
+
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError):
+        mmck(0.0, 1.0, 1, 1)
+    with pytest.raises(ValueError):
+        mmck(1.0, 1.0, 0, 1)
+
+
+def test_engine_matches_mmck():
+    params = {"n_clients": 10, "simulation_time": 500.0, "lam": 0.5,
+              "mu": 2.0, "num_servers": 2, "queue_size": 3}
+    report = summarize_replications(replicate(10, params, seed=1, processes=1))
+    result = compare(report, params)
+    failed = {name: row for name, row in result.items() if not row[3]}
+    assert not failed, failed
+    assert math.isclose(report["server_delay"][0], 1 / params["mu"], rel_tol=0.05)
+
+
+def test_numpy_scalar_rate():
+    # a NumPy scalar is one rate for every client, not a per-client sequence
+    expected = engine_summary(n_clients=3, lam=2.0)
+    for lam in (np.int64(2), np.float32(2.0)):
+        assert engine_summary(n_clients=3, lam=lam) == expected
+        engine = Engine(n_clients=3, lam=lam, trace_sinks=[], store_traces=False)
+        assert [engine.ClientRate(i) for i in range(3)] == [lam] * 3
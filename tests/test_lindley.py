@@ -0,0 +1,32 @@
+import math
+
+import numpy as np
+import pytest
+
+from LindleyEngine import LindleyEngine
+from Replications import replicate, replication_seeds, confidence_interval
+
+METRICS = ("drop_rate", "queue_delay", "server_delay", "queue_length", "utilization")
+
+
+@pytest.mark.parametrize("num_servers, queue_size, lam", [(1, 3, 0.35), (1, 10, 0.5),
+                                                          (2, 2, 0.7), (4, 5, 1.2)])
+def test_lindley_matches_engine(num_servers, queue_size, lam):
+    params = {"n_clients": 10, "num_sources": 2, "simulation_time": 400.0, "lam": lam,
+              "mu": 2.0, "num_servers": num_servers, "queue_size": queue_size}
+    n = 12
+    engine_runs = [summary for _, summary in replicate(n, params, seed=1, processes=1)]
+    lindley_runs = []
+    for seed in replication_seeds(2, n):
+        engine = LindleyEngine(seed=seed, **params)
+        engine.Run()
+        lindley_runs.append(engine.Summary())
+
+    # the two simulators use different random streams: their means must
+    # agree within the combined 99% interval of the difference
+    for name in METRICS:
+        a = np.array([r[name] for r in engine_runs])
+        b = np.array([r[name] for r in lindley_runs])
+        _, half_a = confidence_interval(a, 0.99)
+        _, half_b = confidence_interval(b, 0.99)
+        assert abs(a.mean() - b.mean()) <= math.hypot(half_a, half_b), name
@@ -0,0 +1,52 @@
+import contextlib
+import io
+
+import pytest
+
+from Engine import Engine
+from Parallel import ParallelEngine
+from Replications import reset_counters
+from Topology import Topology
+
+
+def sequential_summary(**params) -> dict:
+    reset_counters()
+    engine = Engine(trace_sinks=[], store_traces=False, **params)
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.Run()
+    return engine.Summary()
+
+
+def parallel_summary(n_partitions: int, **params) -> dict:
+    reset_counters()
+    engine = ParallelEngine(n_partitions=n_partitions, **params)
+    engine.Run()
+    return engine.Summary()
+
+
+PARAMS = dict(n_clients=60, lam=1.0, mu=30.0, queue_size=5, simulation_time=20.0, seed=3)
+
+
+@pytest.mark.parametrize("n_partitions", [1, 3])
+def test_gateway_partitions_match_sequential(n_partitions):
+    params = dict(PARAMS, num_sources=6, transmission_delay=0.05)
+    assert parallel_summary(n_partitions, **params) == sequential_summary(**params)
+
+
+@pytest.mark.parametrize("capacity", [None, 200.0])
+def test_topology_partitions_match_sequential(capacity):
+    # links carry transmission state, so every run gets its own topology
+    def mesh():
+        return Topology.random_mesh(8, delay=(0.01, 0.05), capacity=capacity, seed=5)
+
+    expected = sequential_summary(topology=mesh(), **PARAMS)
+    assert expected["hops"] > 0
+    assert parallel_summary(3, topology=mesh(), **PARAMS) == expected
+
+
+def test_topology_lookahead_is_fastest_cut_link():
+    topology = Topology.random_mesh(8, delay=(0.01, 0.05), seed=5)
+    engine = ParallelEngine(n_partitions=2, topology=topology, **PARAMS)
+    cut = [link.cost() for out in topology.links for link in out.values()
+           if (link.source < 4) != (link.target < 4)]
+    assert engine.lookahead == min(cut)
@@ -0,0 +1,39 @@
+import math
+
+from Analytics import mmck
+from RareEvent import ImportanceSplitting, clone
+import Checkpoint
+from Engine import Engine
+
+PARAMS = {"n_clients": 4, "num_sources": 1, "lam": 0.0625, "mu": 1.0,
+          "num_servers": 1, "queue_size": 4}
+
+
+def test_estimate_matches_mmck_blocking():
+    exact = mmck(0.25, 1.0, 1, PARAMS["queue_size"])["blocking"]
+    report = ImportanceSplitting(PARAMS, effort=50, seed=3).estimate(repetitions=20)
+    mean, half_width, relative_error = report["drop_probability"]
+    assert relative_error < 0.2
+    assert abs(mean - exact) <= half_width
+
+
+def test_clone_redraws_pending_events_after_now():
+    engine = Engine(seed=1, trace_sinks=[], store_traces=False, simulation_time=math.inf,
+                    **PARAMS)
+    events = engine.EventLoop()
+    for evt in events:
+        if engine.n_events == 200:
+            now = evt.event_time
+            break
+    events.close()
+    blob = Checkpoint.snapshot(engine)
+    pending = len(engine.scheduler)
+
+    seed = ImportanceSplitting(PARAMS, seed=1).seed_seq
+    times = []
+    for child in seed.spawn(2):
+        copy = clone(blob, child, now=now)
+        assert len(copy.scheduler) == pending
+        assert copy.scheduler.get_current_time() >= now
+        times.append(copy.scheduler.get_current_time())
+    assert times[0] != times[1]
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from Sweep import cache_key, sweep
+from Topology import Topology
+
+
+def test_sweep_needs_a_replication():
+    with pytest.raises(ValueError, match="at least one replication"):
+        sweep({"lam": [1.0]}, replications=0, processes=1)
+
+
+def test_cache_key_rejects_non_json_parameters():
+    with pytest.raises(ValueError, match="'topology'"):
+        cache_key({"topology": Topology.random_mesh(4, seed=1)}, 0, 2, "v")
+
+
+def test_cache_key_accepts_numpy_scalars():
+    assert (cache_key({"lam": np.float64(2.0), "num_servers": np.int64(2)}, 0, 2, "v")
+            == cache_key({"lam": 2.0, "num_servers": 2}, 0, 2, "v"))
+
+
+def test_sweep_caches_numpy_points(tmp_path):
+    grid = {"num_servers": [np.int64(1)]}
+    base = {"n_clients": 2, "simulation_time": 2.0}
+    first = sweep(grid, base, replications=2, cache_dir=str(tmp_path), processes=1)
+    again = sweep(grid, base, replications=2, cache_dir=str(tmp_path), processes=1)
+    assert first == again